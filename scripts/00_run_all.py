@@ -1,45 +1,65 @@
 # scripts/00_run_all.py
 from __future__ import annotations
 import sys
+import importlib
 import importlib.util
-import subprocess
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path("src").resolve()))
+from audit_lib.config import get_config
 
 def have(mod: str) -> bool:
     return importlib.util.find_spec(mod) is not None
 
-def runm(mod: str, *args: str) -> None:
-    cmd = [sys.executable, "-m", mod] + list(args)
-    print(">>> " + " ".join(cmd), flush=True)
-    subprocess.run(cmd, check=True)
+def runm(mod: str, **kwargs) -> int:
+    """Import a stage module and call its main() in this interpreter; returns its exit code."""
+    print(f">>> {mod}.main()", flush=True)
+    try:
+        rc = importlib.import_module(mod).main(**kwargs)
+    except SystemExit as e:
+        if isinstance(e.code, str):
+            print(e.code, file=sys.stderr)
+            return 1
+        rc = e.code
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return int(rc or 0)
 
 def main() -> int:
+    cfg = get_config()
+    # One worker pool for every pooled stage, so workers start (and import) once per run
+    with ProcessPoolExecutor() as pool:
+        return _run_stages(cfg, pool)
+
+def _run_stages(cfg, pool: ProcessPoolExecutor) -> int:
     # 1) Extract + enrich (optional)
     if have("scripts.11_extract_and_enrich_DIRECT"):
-        runm("scripts.11_extract_and_enrich_DIRECT")
+        rc = runm("scripts.11_extract_and_enrich_DIRECT", cfg=cfg, pool=pool)
+        if rc:
+            print("[ERROR] extract + enrich failed; see traceback above")
+            return rc
     else:
         print("[WARN] scripts/11_extract_and_enrich_DIRECT.py not found; skipping")
 
     # 2) Canonical builder (required for schema + source_pdf fill)
-    try:
-        runm("scripts.99_build_enriched_fixed")
-    except subprocess.CalledProcessError as e:
+    rc = runm("scripts.99_build_enriched_fixed")
+    if rc:
         print("[ERROR] canonical build failed; see traceback above")
-        return e.returncode
+        return rc
 
     # 3) Adjudication (optional)
     if have("scripts.50_adjudicate"):
-        try:
-            runm("scripts.50_adjudicate")
-        except subprocess.CalledProcessError as e:
+        if runm("scripts.50_adjudicate", cfg=cfg):
             print("[WARN] adjudication failed; continuing")
     else:
         print("[WARN] scripts/50_adjudicate.py not found; skipping")
 
     # 4) Rewrite proposals (optional)
     if have("scripts.52_propose_rewrites"):
-        try:
-            runm("scripts.52_propose_rewrites")
-        except subprocess.CalledProcessError as e:
+        if runm("scripts.52_propose_rewrites", cfg=cfg, argv=[]):
             print("[WARN] rewrite proposals failed; continuing")
     else:
         print("[WARN] scripts/52_propose_rewrites.py not found; skipping")
@@ -48,4 +68,4 @@ def main() -> int:
     return 0
 
 if __name__ == "__main__":
-    raise SystemExit(main())
\ No newline at end of file
+    raise SystemExit(main())
@@ -1,27 +1,25 @@
-import os, re, uuid, yaml, pandas as pd
+import csv, hashlib, os, re, tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache, partial
 from pathlib import Path
-from docx import Document
+from audit_lib.config import get_config
+from audit_lib.docx_utils import docx_to_text
 from audit_lib.text_utils import split_sentences, has_numbers, is_causal_or_normative
 from audit_lib.citations import parse_citations
 
-CONFIG = yaml.safe_load(open("config/config.yaml","r",encoding="utf-8"))
-
-REVIEWS_DIR = CONFIG["paths"]["reviews_dir"]
-OUTPUTS_DIR = CONFIG["paths"]["outputs_dir"]
-PDF_DIR = CONFIG["paths"]["pdf_dir"]
-
-CCP_PATH = os.path.join(OUTPUTS_DIR, "ccp_registry.csv")
-REFS_INDEX = Path(OUTPUTS_DIR)/"references_index.csv"
-
 FIELDNAMES = ["review_id","section","claim_id","claim_text","is_quote","has_numbers","is_causal_or_normative",
               "citation_text","citation_type","citation_author","citation_year","is_secondary",
               "primary_mentioned_author","primary_mentioned_year","stated_page","in_reference_list",
               "source_pdf_path","priority"]
 
+_QUOTE_RE = re.compile(r'["“”\']')
+# Every citation pattern in audit_lib.citations needs a four-digit year
+_YEAR_RE = re.compile(r"\d{4}")
+
 def load_text_from_file(path: Path) -> str:
     if path.suffix.lower() == ".docx":
-        doc = Document(str(path))
-        return "\n".join([p.text for p in doc.paragraphs])
+        return docx_to_text(path)
     else:
         return Path(path).read_text(encoding="utf-8", errors="ignore")
 
@@ -42,68 +40,114 @@ def infer_sections(lines):
 def priority_flag(is_quote, has_nums, is_causal):
     return "High" if (is_quote or has_nums or is_causal) else "Low"
 
-def build_refs_lookup():
-    if not REFS_INDEX.exists():
-        return set()
-    df = pd.read_csv(REFS_INDEX)
-    df["first_author_norm"] = df["first_author"].str.strip().str.lower()
-    df["year_norm"] = df["year"].astype(str).str.strip().str.lower()
-    return set(zip(df["first_author_norm"], df["year_norm"]))
+def build_refs_lookup(refs_index: Path) -> frozenset:
+    if not refs_index.exists():
+        return frozenset()
+    with open(refs_index, "r", encoding="utf-8", newline="") as f:
+        return frozenset((r["first_author"].strip().lower(), r["year"].strip().lower()) for r in csv.DictReader(f))
 
+# Author strings repeat heavily across citations and reviews (per worker process)
+@lru_cache(maxsize=None)
 def first_author_key(author_str: str) -> str:
     a = author_str.split("&")[0].split("and")[0].strip()
     a = a.split(",")[0].strip()
     return a.split()[0].lower()
 
-def main():
-    os.makedirs(OUTPUTS_DIR, exist_ok=True)
-    refs_set = build_refs_lookup()
+def process_file(path: Path, refs_set: frozenset, pdf_dir: str, pdf_files: frozenset) -> list:
     rows = []
-    for f in Path(REVIEWS_DIR).glob("*"):
-        if f.suffix.lower() not in {".docx",".md",".txt"}:
+    # (author, year) -> (in_reference_list, source_pdf_path); the same source is cited many times per review
+    by_cit = {}
+    text = load_text_from_file(path)
+    lines = text.splitlines()
+    current_review_id = path.stem
+    for section, line in infer_sections(lines):
+        if not _YEAR_RE.search(line):
             continue
-        text = load_text_from_file(f)
-        lines = text.splitlines()
-        current_review_id = f.stem
-        for section, line in infer_sections(lines):
-            for sent in split_sentences(line):
-                cits = parse_citations(sent)
-                if not cits: 
-                    continue
-                is_quote = bool(re.search(r'["“”\']', sent))
-                nums = has_numbers(sent)
-                causal = is_causal_or_normative(sent)
-                for cit in cits:
-                    claim_id = str(uuid.uuid4())[:8]
-                    fa_key = first_author_key(cit["author"])
-                    yr_key = cit["year"].lower()
-                    in_refs = (fa_key, yr_key) in refs_set if refs_set else ""
-                    pdf_guess = os.path.join(PDF_DIR, f"{cit['author'].split(',')[0].replace(' ','_')}_{cit['year']}.pdf")
-                    rows.append({
-                        "review_id": current_review_id,
-                        "section": section,
-                        "claim_id": claim_id,
-                        "claim_text": sent.strip(),
-                        "is_quote": is_quote,
-                        "has_numbers": nums,
-                        "is_causal_or_normative": causal,
-                        "citation_text": cit["citation_text"],
-                        "citation_type": cit["citation_type"],
-                        "citation_author": cit["author"],
-                        "citation_year": cit["year"],
-                        "is_secondary": bool(cit["is_secondary"]),
-                        "primary_mentioned_author": cit.get("primary_mentioned_author") or "",
-                        "primary_mentioned_year": cit.get("primary_mentioned_year") or "",
-                        "stated_page": cit.get("stated_page") or "",
-                        "in_reference_list": in_refs,
-                        "source_pdf_path": pdf_guess if os.path.exists(pdf_guess) else "",
-                        "priority": priority_flag(is_quote, nums, causal)
-                    })
-    if rows:
-        pd.DataFrame(rows, columns=FIELDNAMES).to_csv(CCP_PATH, index=False)
-        print(f"[OK] wrote {CCP_PATH}")
+        for sent in split_sentences(line):
+            if not _YEAR_RE.search(sent):
+                continue
+            cits = parse_citations(sent)
+            if not cits: 
+                continue
+            is_quote = bool(_QUOTE_RE.search(sent))
+            nums = has_numbers(sent)
+            causal = is_causal_or_normative(sent)
+            for cit in cits:
+                # Same 8-hex width as before, but deterministic across runs; the row
+                # ordinal keeps repeated sentence+citation pairs distinct within a review
+                claim_id = hashlib.blake2b(f"{current_review_id}:{len(rows)}:{sent}:{cit['citation_text']}".encode(), digest_size=4).hexdigest()
+                cit_key = (cit["author"], cit["year"])
+                hit = by_cit.get(cit_key)
+                if hit is None:
+                    in_refs = (first_author_key(cit["author"]), cit["year"].lower()) in refs_set if refs_set else ""
+                    pdf_name = f"{cit['author'].split(',', 1)[0].replace(' ','_')}_{cit['year']}.pdf"
+                    # Only join a path for names that are actually in the directory listing
+                    hit = by_cit[cit_key] = (in_refs, os.path.join(pdf_dir, pdf_name) if os.path.normcase(pdf_name) in pdf_files else "")
+                in_refs, source_pdf_path = hit
+                rows.append({
+                    "review_id": current_review_id,
+                    "section": section,
+                    "claim_id": claim_id,
+                    "claim_text": sent.strip(),
+                    "is_quote": is_quote,
+                    "has_numbers": nums,
+                    "is_causal_or_normative": causal,
+                    "citation_text": cit["citation_text"],
+                    "citation_type": cit["citation_type"],
+                    "citation_author": cit["author"],
+                    "citation_year": cit["year"],
+                    "is_secondary": bool(cit["is_secondary"]),
+                    "primary_mentioned_author": cit.get("primary_mentioned_author") or "",
+                    "primary_mentioned_year": cit.get("primary_mentioned_year") or "",
+                    "stated_page": cit.get("stated_page") or "",
+                    "in_reference_list": in_refs,
+                    "source_pdf_path": source_pdf_path,
+                    "priority": priority_flag(is_quote, nums, causal)
+                })
+    return rows
+
+def main(cfg=None, outputs_dir=None, pdf_dir=None, pool=None) -> int:
+    """
+    outputs_dir / pdf_dir override the config paths (used by 11_extract_and_enrich_DIRECT).
+    pool: an Executor shared by the caller (00_run_all); a private one is created otherwise.
+    """
+    cfg = cfg or get_config()
+    reviews_dir = cfg["paths"]["reviews_dir"]
+    outputs_dir = outputs_dir or cfg["paths"]["outputs_dir"]
+    pdf_dir = pdf_dir or cfg["paths"]["pdf_dir"]
+    ccp_path = os.path.join(outputs_dir, "ccp_registry.csv")
+    refs_index = Path(outputs_dir)/"references_index.csv"
+
+    os.makedirs(outputs_dir, exist_ok=True)
+    refs_set = build_refs_lookup(refs_index)
+    # One directory listing instead of a stat() per citation; normcase'd so lookups stay
+    # case-insensitive on Windows, as Path.exists() was
+    pdf_files = frozenset(map(os.path.normcase, os.listdir(pdf_dir))) if os.path.isdir(pdf_dir) else frozenset()
+    files = [f for f in Path(reviews_dir).glob("*") if f.suffix.lower() in {".docx",".md",".txt"}]
+    n_rows = 0
+    # Files are independent; parse them on all cores (map keeps input order) and stream each
+    # file's rows to a sibling temp file, which replaces the registry only if rows were found
+    # (with none, an existing ccp_registry.csv is left as it was)
+    with tempfile.NamedTemporaryFile("w", newline="", encoding="utf-8", dir=outputs_dir,
+                                     prefix="ccp_registry.csv.", suffix=".tmp", delete=False) as fh:
+        try:
+            with (nullcontext(pool) if pool else ProcessPoolExecutor()) as ex:
+                w = csv.DictWriter(fh, fieldnames=FIELDNAMES)
+                w.writeheader()
+                for file_rows in ex.map(partial(process_file, refs_set=refs_set, pdf_dir=pdf_dir, pdf_files=pdf_files), files):
+                    w.writerows(file_rows)
+                    n_rows += len(file_rows)
+        except BaseException:
+            fh.close()
+            os.unlink(fh.name)
+            raise
+    if n_rows:
+        os.replace(fh.name, ccp_path)
+        print(f"[OK] wrote {ccp_path}")
     else:
+        os.unlink(fh.name)
         print("No citations found. Check formats or improve parsing rules.")
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(main())
\ No newline at end of file
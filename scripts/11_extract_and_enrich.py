@@ -4,13 +4,13 @@
 Final direct-output path: run CCP extraction in-memory, then enrich and write ONLY outputs/ccp_registry_enriched.csv.
 Refactor your extractor so extract_raw_rows() returns a list[dict] in the same schema your old ccp_registry.csv used.
 """
-import yaml
 from pathlib import Path
 from typing import List, Dict
 
-from audit_lib.enrich import enrich_registry_rows, write_enriched_csv
+from audit_lib.enrich import iter_enriched_rows, write_enriched_csv
+from audit_lib.config import get_config
 
-CFG = yaml.safe_load(open("config/config.yaml","r",encoding="utf-8"))
+CFG = get_config()
 OUT_DIR = Path(CFG["paths"]["outputs_dir"])
 REVIEWS_DIR = Path(CFG["paths"]["reviews_dir"])
 
@@ -27,9 +27,9 @@ def extract_raw_rows() -> List[Dict[str,str]]:
 
 def main():
     rows = extract_raw_rows()
-    enriched = enrich_registry_rows(rows, REVIEWS_DIR)
     out_csv = OUT_DIR / "ccp_registry_enriched.csv"
-    write_enriched_csv(enriched, out_csv)
+    # Enriched rows go straight to the writer instead of into a second list
+    write_enriched_csv(iter_enriched_rows(rows, REVIEWS_DIR), out_csv)
     print(f"[OK] wrote enriched registry -> {out_csv}")
 
 if __name__ == "__main__":
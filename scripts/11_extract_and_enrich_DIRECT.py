@@ -2,43 +2,35 @@
 # -*- coding: utf-8 -*-
 """
 Run the existing extractor WITHOUT leaving raw outputs, then enrich in-memory:
-  1) Backup config/config.yaml
-  2) Write a TEMP config that redirects outputs_dir to a temp folder
-  3) Run `python -m scripts.10_extract_ccps` (extractor) -> temp/ccp_registry.csv
-  4) Read temp raw CSV
-  5) Enrich (docx headings + PDF resolver) and write ONLY outputs/ccp_registry_enriched.csv
-  6) Clean up temp and restore real config.yaml
+  1) Run scripts.10_extract_ccps.main() in-process with outputs_dir -> a temp folder
+  2) Read temp raw CSV
+  3) Enrich (docx headings + PDF resolver) and write ONLY outputs/ccp_registry_enriched.csv
+  4) Clean up temp
 """
 
 from __future__ import annotations
 import csv
+import importlib
 import shutil
-import subprocess
 import sys
 import tempfile
 from pathlib import Path
-from typing import Dict, List
-
-import yaml
 
 # import our enrichment library
 sys.path.insert(0, str(Path("src").resolve()))
-from audit_lib.enrich import enrich_registry_rows, write_enriched_csv  # type: ignore
+from audit_lib.config import get_config  # type: ignore
+from audit_lib.enrich import iter_enriched_rows, write_enriched_csv  # type: ignore
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 CONFIG_DIR = REPO_ROOT / "config"
 CONFIG_FILE = CONFIG_DIR / "config.yaml"
 
-def _read_csv(path: Path) -> List[Dict[str, str]]:
-    with open(path, "r", encoding="utf-8-sig", newline="") as f:
-        return list(csv.DictReader(f))
-
-def main():
+def main(cfg=None, pool=None) -> int:
     if not CONFIG_FILE.exists():
         raise SystemExit(f"ERROR: {CONFIG_FILE} not found")
 
-    # Load the real config
-    real_cfg = yaml.safe_load(open(CONFIG_FILE, "r", encoding="utf-8"))
+    # Load the real config (unless the caller already parsed it)
+    real_cfg = cfg or get_config(CONFIG_FILE)
     real_outputs_dir = REPO_ROOT / real_cfg["paths"]["outputs_dir"]
     real_reviews_dir = REPO_ROOT / real_cfg["paths"]["reviews_dir"]
     real_pdf_dir = REPO_ROOT / real_cfg["paths"]["pdf_dir"]
@@ -49,29 +41,12 @@ def main():
         tmp_outputs = tmp_root / "outputs"
         tmp_outputs.mkdir(parents=True, exist_ok=True)
 
-        # Prepare a TEMP config.yaml that points outputs_dir to tmp_outputs
-        temp_cfg = dict(real_cfg)
-        temp_cfg_paths = dict(temp_cfg.get("paths", {}))
-        temp_cfg_paths["outputs_dir"] = str(tmp_outputs)
-        temp_cfg["paths"] = temp_cfg_paths
-
-        # Backup real config and write the temp config
-        backup_path = CONFIG_DIR / "config.yaml.bak"
-        shutil.copy2(CONFIG_FILE, backup_path)
-        try:
-            with open(CONFIG_FILE, "w", encoding="utf-8") as wf:
-                yaml.safe_dump(temp_cfg, wf, sort_keys=False, allow_unicode=True)
-
-            # Run the existing extractor against the TEMP config
-            print("[RUN] extractor → temp outputs")
-            subprocess.run(
-                [sys.executable, "-m", "scripts.10_extract_ccps"],
-                cwd=str(REPO_ROOT),
-                check=True,
-            )
-        finally:
-            shutil.copy2(backup_path, CONFIG_FILE)
-            backup_path.unlink(missing_ok=True)
+        # Run the existing extractor with outputs redirected to tmp_outputs
+        print("[RUN] extractor → temp outputs")
+        extractor = importlib.import_module("scripts.10_extract_ccps")
+        rc = extractor.main(real_cfg, outputs_dir=str(tmp_outputs), pool=pool)
+        if rc:
+            raise SystemExit(f"ERROR: extractor failed with exit code {rc}")
 
         # Read the TEMP raw registry
         tmp_raw = tmp_outputs / "ccp_registry.csv"
@@ -79,12 +54,13 @@ def main():
             raise SystemExit(
                 f"ERROR: Expected {tmp_raw} not found. Ensure scripts/10_extract_ccps.py writes ccp_registry.csv."
             )
-        raw_rows = _read_csv(tmp_raw)
 
-        # Enrich in-memory and write ONLY the real enriched file (pass pdf_dir!)
-        enriched_rows = enrich_registry_rows(raw_rows, REPO_ROOT / real_reviews_dir, REPO_ROOT / real_pdf_dir)
+        # Enrich row by row and write ONLY the real enriched file (pass pdf_dir!);
+        # rows stream from the temp reader to the writer without a list in between
         real_enriched = REPO_ROOT / real_outputs_dir / "ccp_registry_enriched.csv"
-        write_enriched_csv(enriched_rows, real_enriched)
+        with open(tmp_raw, "r", encoding="utf-8-sig", newline="") as f:
+            enriched_rows = iter_enriched_rows(csv.DictReader(f), REPO_ROOT / real_reviews_dir, REPO_ROOT / real_pdf_dir)
+            write_enriched_csv(enriched_rows, real_enriched)
         print(f"[OK] wrote enriched registry -> {real_enriched}")
 
     finally:
@@ -92,6 +68,7 @@ def main():
             shutil.rmtree(tmp_root)
         except Exception:
             pass
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(main())
\ No newline at end of file
@@ -4,29 +4,25 @@
 Temporary shim: read outputs/ccp_registry.csv, enrich it, write ONLY outputs/ccp_registry_enriched.csv.
 Use this until your extractor is refactored to return rows in memory.
 """
-import csv, yaml
+import csv
 from pathlib import Path
-from typing import List, Dict
 
-from audit_lib.enrich import enrich_registry_rows, write_enriched_csv
+from audit_lib.enrich import iter_enriched_rows, write_enriched_csv
+from audit_lib.config import get_config
 
-CFG = yaml.safe_load(open("config/config.yaml","r",encoding="utf-8"))
+CFG = get_config()
 OUT_DIR = Path(CFG["paths"]["outputs_dir"])
 REVIEWS_DIR = Path(CFG["paths"]["reviews_dir"])
 
 RAW_CSV = OUT_DIR / "ccp_registry.csv"
 ENRICHED_CSV = OUT_DIR / "ccp_registry_enriched.csv"
 
-def _read_csv(path: Path) -> List[Dict[str,str]]:
-    with open(path, "r", encoding="utf-8-sig", newline="") as f:
-        return list(csv.DictReader(f))
-
 def main():
     if not RAW_CSV.exists():
         raise SystemExit(f"ERROR: {RAW_CSV} not found. Run your extractor once to produce it, then re-run this shim.")
-    rows = _read_csv(RAW_CSV)
-    enriched = enrich_registry_rows(rows, REVIEWS_DIR)
-    write_enriched_csv(enriched, ENRICHED_CSV)
+    # Rows stream from the reader through enrichment to the writer, one at a time
+    with open(RAW_CSV, "r", encoding="utf-8-sig", newline="") as f:
+        write_enriched_csv(iter_enriched_rows(csv.DictReader(f), REVIEWS_DIR), ENRICHED_CSV)
     print(f"[OK] wrote enriched registry -> {ENRICHED_CSV}")
 
 if __name__ == "__main__":
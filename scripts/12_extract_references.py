@@ -1,34 +1,51 @@
-import os, yaml
+import csv, os, tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
-from docx import Document
+from audit_lib.docx_utils import docx_to_text
 from audit_lib.refs import index_references
-import pandas as pd
+from audit_lib.config import get_config
 
-CONFIG = yaml.safe_load(open("config/config.yaml","r",encoding="utf-8"))
+CONFIG = get_config()
 REVIEWS_DIR = CONFIG["paths"]["reviews_dir"]
 OUT_DIR = CONFIG["paths"]["outputs_dir"]
 
 OUT_PATH = Path(OUT_DIR)/"references_index.csv"
+FIELDNAMES = ["review_id","first_author","year","raw_line"]
 
 def load_text(path: Path) -> str:
     if path.suffix.lower() == ".docx":
-        doc = Document(str(path))
-        return "\n".join([p.text for p in doc.paragraphs])
+        return docx_to_text(path)
     else:
         return path.read_text(encoding="utf-8", errors="ignore")
 
-def main():
-    rows = []
-    for f in Path(REVIEWS_DIR).glob("*"):
-        if f.suffix.lower() not in {".docx",".md",".txt"}:
-            continue
-        text = load_text(f)
-        rid = f.stem
-        rows.extend(index_references(text, rid))
-    if rows:
-        pd.DataFrame(rows).to_csv(OUT_PATH, index=False)
+def process_file(path: Path) -> list:
+    return index_references(load_text(path), path.stem)
+
+def main(pool=None):
+    files = [f for f in Path(REVIEWS_DIR).glob("*") if f.suffix.lower() in {".docx",".md",".txt"}]
+    n_rows = 0
+    # Rows stream to a sibling temp file, which replaces the index only if rows were found
+    # (with none, or on a crash, an existing references_index.csv is left as it was)
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", newline="", encoding="utf-8", dir=OUT_PATH.parent,
+                                     prefix=OUT_PATH.name + ".", suffix=".tmp", delete=False) as fh:
+        try:
+            with (nullcontext(pool) if pool else ProcessPoolExecutor()) as ex:
+                w = csv.DictWriter(fh, fieldnames=FIELDNAMES)
+                w.writeheader()
+                for file_rows in ex.map(process_file, files):
+                    w.writerows(file_rows)
+                    n_rows += len(file_rows)
+        except BaseException:
+            fh.close()
+            os.unlink(fh.name)
+            raise
+    if n_rows:
+        os.replace(fh.name, OUT_PATH)
         print(f"[OK] wrote {OUT_PATH}")
     else:
+        os.unlink(fh.name)
         print("No references detected. Ensure a 'References' heading exists and entries follow 'Surname, X. (Year)' format.")
 
 if __name__ == "__main__":
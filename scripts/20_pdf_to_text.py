@@ -1,21 +1,30 @@
-import os, yaml
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
 from pathlib import Path
 from audit_lib.pdf_utils import pdf_to_text_with_page_markers
+from audit_lib.config import get_config
 
-CONFIG = yaml.safe_load(open("config/config.yaml","r",encoding="utf-8"))
+CONFIG = get_config()
 PDF_DIR = CONFIG["paths"]["pdf_dir"]
 OUT_DIR = CONFIG["paths"]["sources_text_dir"]
 
-def main():
+def _convert_one(pdf: Path) -> str:
+    out = Path(OUT_DIR) / (pdf.stem + ".txt")
+    try:
+        text = pdf_to_text_with_page_markers(str(pdf))
+        out.write_text(text, encoding="utf-8")
+        return f"[OK] {pdf.name} -> {out.name}"
+    except Exception as e:
+        return f"[ERR] {pdf.name}: {e}"
+
+def main(pool=None):
     os.makedirs(OUT_DIR, exist_ok=True)
-    for pdf in Path(PDF_DIR).glob("*.pdf"):
-        out = Path(OUT_DIR) / (pdf.stem + ".txt")
-        try:
-            text = pdf_to_text_with_page_markers(str(pdf))
-            out.write_text(text, encoding="utf-8")
-            print(f"[OK] {pdf.name} -> {out.name}")
-        except Exception as e:
-            print(f"[ERR] {pdf.name}: {e}")
+    pdfs = list(Path(PDF_DIR).glob("*.pdf"))
+    # One PDF per worker; report in completion order so fast files don't wait on slow ones
+    with (nullcontext(pool) if pool else ProcessPoolExecutor()) as ex:
+        for fut in as_completed([ex.submit(_convert_one, pdf) for pdf in pdfs]):
+            print(fut.result())
 
 if __name__ == "__main__":
     main()
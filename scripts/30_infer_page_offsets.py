@@ -1,59 +1,70 @@
-import os, re, yaml, pandas as pd
+import math, os, re
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from statistics import median
 from pathlib import Path
-from audit_lib.pdf_utils import split_pages
+from audit_lib.pdf_utils import split_pages, build_page_index
+from audit_lib.text_utils import normalize_quotes
+from audit_lib.config import get_config
 
-CONFIG = yaml.safe_load(open("config/config.yaml","r",encoding="utf-8"))
+CONFIG = get_config()
 TEXT_DIR   = Path(CONFIG["paths"]["sources_text_dir"])
 OUT_DIR    = Path(CONFIG["paths"]["outputs_dir"])
 
 CCP_PATH = OUT_DIR/"ccp_registry.csv"
 OFFSETS = OUT_DIR/"page_offsets.csv"
 
-def normalize_quotes(s: str) -> str:
-    return s.replace("“","\"").replace("”","\"").replace("’","'").replace("‘","'")
+_QUOTED_SPAN_RE = re.compile(r'["“](.+?)["”]')
+_LEADING_INT_RE = re.compile(r"^(\d+)")
+_CCP_COLS = ["claim_text", "is_quote", "stated_page", "source_pdf_path"]
 
-def find_quote_page(pages: dict, quote: str):
-    q = normalize_quotes(quote.strip())
-    for pno, ptext in pages.items():
-        if normalize_quotes(ptext).find(q) != -1:
-            return pno
-    return None
+def find_quote_page(page_index, quote: str):
+    buf, starts, pnos = page_index
+    i = buf.find(normalize_quotes(quote.strip()))
+    if i == -1 or not pnos:
+        return None
+    return pnos[bisect_right(starts, i) - 1]
 
-def main():
+def _per_pdf(item):
+    """(pdf_path, quotes, stated pages) -> offset row, or None when nothing matched."""
+    pdf_path, quotes, stated_pages = item
+    if not isinstance(pdf_path, str) or not pdf_path or not Path(pdf_path).exists():
+        return None
+    txt_path = Path(TEXT_DIR)/ (Path(pdf_path).stem + ".txt")
+    if not txt_path.exists():
+        return None
+    txt = txt_path.read_text(encoding="utf-8", errors="ignore")
+    page_index = build_page_index(split_pages(txt))
+    offsets = []
+    for quote, stated in zip(quotes, stated_pages):
+        found_page = find_quote_page(page_index, quote)
+        if found_page is None:
+            continue
+        offsets.append(int(stated) - int(found_page))
+    if not offsets:
+        return None
+    off = math.floor(median(offsets))  # even count: floor of the two middle values' mean
+    return {"source_pdf_path": pdf_path, "logical_minus_pdf_offset": off, "n_examples": len(offsets)}
+
+def main(pool=None):
     if not CCP_PATH.exists():
         print("Missing ccp_registry.csv")
         return
-    df = pd.read_csv(CCP_PATH)
+    import pandas as pd
+    # Only the columns used below; the rest of the registry is never tokenized into objects
+    df = pd.read_csv(CCP_PATH, usecols=_CCP_COLS, dtype={"claim_text": str, "stated_page": str, "source_pdf_path": str})
     df = df[(df["is_quote"]==True) | (df["is_quote"]==1)]
-    df = df[df["stated_page"].astype(str).str.len()>0]
-    rows = []
-    for (pdf_path), g in df.groupby("source_pdf_path"):
-        if not isinstance(pdf_path, str) or not pdf_path or not Path(pdf_path).exists():
-            continue
-        txt_path = Path(TEXT_DIR)/ (Path(pdf_path).stem + ".txt")
-        if not txt_path.exists():
-            continue
-        txt = txt_path.read_text(encoding="utf-8", errors="ignore")
-        pages = split_pages(txt)
-        offsets = []
-        for _, r in g.iterrows():
-            m = re.search(r'["“](.+?)["”]', str(r["claim_text"]))
-            if not m:
-                continue
-            quote = m.group(1)
-            found_page = find_quote_page(pages, quote)
-            if found_page is None:
-                continue
-            m2 = re.match(r"(\d+)", str(r["stated_page"]))
-            if not m2:
-                continue
-            stated = int(m2.group(1))
-            offsets.append(stated - int(found_page))
-        if offsets:
-            offsets_sorted = sorted(offsets)
-            mid = len(offsets_sorted)//2
-            off = offsets_sorted[mid] if len(offsets_sorted)%2==1 else (offsets_sorted[mid-1]+offsets_sorted[mid])//2
-            rows.append({"source_pdf_path": pdf_path, "logical_minus_pdf_offset": off, "n_examples": len(offsets)})
+    # First quoted span and leading page number, extracted column-wise up front
+    df = df.assign(
+        quote=df["claim_text"].str.extract(_QUOTED_SPAN_RE, expand=False),
+        stated=df["stated_page"].str.extract(_LEADING_INT_RE, expand=False),
+    ).dropna(subset=["quote", "stated"])
+    df["stated"] = df["stated"].astype(int)
+    # PDFs are independent; ship each worker plain lists, not DataFrame slices
+    work = [(pdf_path, g["quote"].tolist(), g["stated"].tolist()) for pdf_path, g in df.groupby("source_pdf_path")]
+    with (nullcontext(pool) if pool else ProcessPoolExecutor()) as ex:
+        rows = [r for r in ex.map(_per_pdf, work) if r is not None]
     if rows:
         pd.DataFrame(rows).to_csv(OFFSETS, index=False)
         print(f"[OK] wrote offsets -> {OFFSETS}")
@@ -1,10 +1,16 @@
-import os, yaml, json, re
+import os, re
+import orjson
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 import pandas as pd
 from pathlib import Path
-from audit_lib.pdf_utils import split_pages
-from audit_lib.retrieval import chunk_pages_to_windows, top_k_chunks_for_claim
+from audit_lib.pdf_utils import split_pages, build_page_index, find_pages
+from audit_lib.text_utils import normalize_quotes
+from audit_lib.retrieval import chunk_pages_to_windows, build_chunk_index, top_k_from_index
+from audit_lib.config import get_config
 
-CONFIG = yaml.safe_load(open("config/config.yaml","r",encoding="utf-8"))
+CONFIG = get_config()
 TEXT_DIR   = Path(CONFIG["paths"]["sources_text_dir"])
 OUT_DIR    = Path(CONFIG["paths"]["outputs_dir"])
 CHUNK_W    = CONFIG["retrieval"]["chunk_words"]
@@ -15,8 +21,7 @@ CCP_PATH = Path(OUT_DIR)/"ccp_registry.csv"
 CANDIDATES_JSONL = Path(OUT_DIR)/"adjudication_inputs.jsonl"
 OFFSETS = Path(OUT_DIR)/"page_offsets.csv"
 
-def normalize_quotes(s: str) -> str:
-    return s.replace("“","\"").replace("”","\"").replace("’","'").replace("‘","'")
+_QUOTED_SPAN_RE = re.compile(r'["“](.+?)["”]')
 
 def load_source_text(pdf_path: str) -> str:
     stem = Path(pdf_path).stem
@@ -25,85 +30,130 @@ def load_source_text(pdf_path: str) -> str:
         return ""
     return txt_path.read_text(encoding="utf-8", errors="ignore")
 
-def find_exact_quote_pages(pages: dict, claim_text: str):
+def load_source_pages(pdf_path: str):
+    """(pages, page index, chunks, page -> chunk indices, fuzzy index) for one source, or None without text."""
+    txt = load_source_text(pdf_path)
+    if not txt:
+        return None
+    pages = split_pages(txt)
+    chunks = chunk_pages_to_windows(pages, chunk_words=CHUNK_W, stride=STRIDE)
+    page_chunks = defaultdict(list)
+    for idx, ch in enumerate(chunks):
+        for p in range(ch["page_start"], ch["page_end"] + 1):
+            page_chunks[p].append(idx)
+    return pages, build_page_index(pages), chunks, page_chunks, build_chunk_index(chunks)
+
+def find_exact_quote_pages(page_index, claim_text: str):
+    # is_quote also fires on apostrophes; without an opening double quote there is no span to look for
+    if '"' not in claim_text and "“" not in claim_text:
+        return []
     pages_with_quote = set()
-    for m in re.finditer(r'["“](.+?)["”]', claim_text):
-        q = normalize_quotes(m.group(1))
-        for pno, ptext in pages.items():
-            if normalize_quotes(ptext).find(q) != -1:
-                pages_with_quote.add(pno)
+    for m in _QUOTED_SPAN_RE.finditer(claim_text):
+        pages_with_quote.update(find_pages(page_index, normalize_quotes(m.group(1))))
     return sorted(pages_with_quote)
 
-def main():
+def candidates_for_claim(row: dict, source, off) -> bytes:
+    """One adjudication_inputs.jsonl line for a claim, given its source from load_source_pages."""
+    pages, page_index, chunks, page_chunks, fuzzy_index = source
+
+    candidate_chunks = []
+    used_idx = set()
+
+    def add_page_chunks(target_pages, max_add=TOPK):
+        added = 0
+        # Chunks covering any target page, in chunk order
+        hits = {idx for p in target_pages for idx in page_chunks.get(p, ())}
+        for idx in sorted(hits - used_idx):
+            ch = chunks[idx]
+            candidate_chunks.append({
+                "page_range": f"{ch['page_start']}" if ch['page_start']==ch['page_end'] else f"{ch['page_start']}-{ch['page_end']}",
+                "text": ch["text"],
+                "score": 100
+            })
+            used_idx.add(idx)
+            added += 1
+            if added >= max_add:
+                return
+
+    exact_pages = find_exact_quote_pages(page_index, str(row["claim_text"])) if bool(row["is_quote"]) else []
+    if exact_pages:
+        add_page_chunks(exact_pages, max_add=TOPK)
+
+    # Anything added once TOPK chunks are in hand is cut by evidence[:TOPK] anyway
+    stated = str(row.get("stated_page") or "").strip() if len(candidate_chunks) < TOPK else ""
+    if stated and off is not None and stated.split("-")[0].isdigit():
+        mapped_pdf_page = int(stated.split("-")[0]) - off
+        if mapped_pdf_page in pages:
+            add_page_chunks([mapped_pdf_page], max_add=max(1, TOPK - len(candidate_chunks)))
+
+    if len(candidate_chunks) < TOPK:
+        rem = TOPK - len(candidate_chunks)
+        fuzzy = top_k_from_index(fuzzy_index, str(row["claim_text"]), k=rem)
+        candidate_chunks.extend(fuzzy)
+
+    payload = {
+        "review_id": row["review_id"],
+        "section": row["section"],
+        "claim_id": row["claim_id"],
+        "claim_text": row["claim_text"],
+        "citation_text": row["citation_text"],
+        "citation_type": row["citation_type"],
+        "is_secondary": bool(row["is_secondary"]),
+        "primary_mentioned_author": row.get("primary_mentioned_author",""),
+        "primary_mentioned_year": row.get("primary_mentioned_year",""),
+        "stated_page": row.get("stated_page",""),
+        "citation_author": row["citation_author"],
+        "citation_year": row["citation_year"],
+        "source_pdf_path": row["source_pdf_path"],
+        "evidence": candidate_chunks[:TOPK]
+    }
+    return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE)
+
+def process_pdf(item):
+    """(pdf_path, offset, [(registry position, row), ...]) -> [(position, line), ...]."""
+    pdf_path, off, rows = item
+    # Built once for all of this PDF's claims and dropped when the group is done
+    source = load_source_pages(pdf_path)
+    if source is None:
+        return []
+    return [(pos, candidates_for_claim(row, source, off)) for pos, row in rows]
+
+def main(pool=None):
     df = pd.read_csv(CCP_PATH)
     offsets = {}
     if OFFSETS.exists():
         odf = pd.read_csv(OFFSETS)
-        for _, r in odf.iterrows():
-            offsets[str(r["source_pdf_path"])] = int(r["logical_minus_pdf_offset"])
-    with open(CANDIDATES_JSONL, "w", encoding="utf-8") as fout:
-        for _, row in df.iterrows():
-            pdf_path = row["source_pdf_path"]
-            if not isinstance(pdf_path, str) or not pdf_path:
-                continue
-            txt = load_source_text(pdf_path)
-            if not txt:
-                continue
-            pages = split_pages(txt)
-            chunks = chunk_pages_to_windows(pages, chunk_words=CHUNK_W, stride=STRIDE)
-
-            candidate_chunks = []
-            used_idx = set()
-
-            def add_page_chunks(target_pages, max_add=TOPK):
-                added = 0
-                for idx, ch in enumerate(chunks):
-                    if idx in used_idx:
-                        continue
-                    if any(ch["page_start"] <= p <= ch["page_end"] for p in target_pages):
-                        candidate_chunks.append({
-                            "page_range": f"{ch['page_start']}" if ch['page_start']==ch['page_end'] else f"{ch['page_start']}-{ch['page_end']}",
-                            "text": ch["text"],
-                            "score": 100
-                        })
-                        used_idx.add(idx)
-                        added += 1
-                        if added >= max_add:
-                            return
-
-            exact_pages = find_exact_quote_pages(pages, str(row["claim_text"])) if bool(row["is_quote"]) else []
-            if exact_pages:
-                add_page_chunks(exact_pages, max_add=TOPK)
-
-            stated = str(row.get("stated_page") or "").strip()
-            off = offsets.get(str(pdf_path), None)
-            if stated and off is not None and stated.split("-")[0].isdigit():
-                mapped_pdf_page = int(stated.split("-")[0]) - int(off)
-                if mapped_pdf_page in pages:
-                    add_page_chunks([mapped_pdf_page], max_add=max(1, TOPK - len(candidate_chunks)))
-
-            if len(candidate_chunks) < TOPK:
-                rem = TOPK - len(candidate_chunks)
-                fuzzy = top_k_chunks_for_claim(str(row["claim_text"]), chunks, k=rem)
-                candidate_chunks.extend(fuzzy)
-
-            payload = {
-                "review_id": row["review_id"],
-                "section": row["section"],
-                "claim_id": row["claim_id"],
-                "claim_text": row["claim_text"],
-                "citation_text": row["citation_text"],
-                "citation_type": row["citation_type"],
-                "is_secondary": bool(row["is_secondary"]),
-                "primary_mentioned_author": row.get("primary_mentioned_author",""),
-                "primary_mentioned_year": row.get("primary_mentioned_year",""),
-                "stated_page": row.get("stated_page",""),
-                "citation_author": row["citation_author"],
-                "citation_year": row["citation_year"],
-                "source_pdf_path": row["source_pdf_path"],
-                "evidence": candidate_chunks[:TOPK]
-            }
-            fout.write(json.dumps(payload, ensure_ascii=False) + "\\n")
+        off = pd.to_numeric(odf["logical_minus_pdf_offset"], errors="coerce")
+        keep = off.notna()
+        offsets = dict(zip(odf.loc[keep, "source_pdf_path"].astype(str), off[keep].astype(int).tolist()))
+    # Group claims by source so each worker loads/chunks a PDF once; positions restore registry order
+    # (the offset is looked up once per source, not per claim)
+    records = df.to_dict("records")
+    work = [
+        (pdf_path, offsets.get(pdf_path), [(pos, records[pos]) for pos in positions])
+        for pdf_path, positions in df.groupby("source_pdf_path", sort=False).indices.items()
+        if isinstance(pdf_path, str) and pdf_path
+    ]
+    # Lines stream out in registry order: a group's lines wait in `ready` only until every
+    # earlier position is settled (written, or known to have no line). Positions without a
+    # source are settled up front, a group's positions once its worker returns.
+    # orjson lines already end in a newline; the 4 MiB buffer batches them into few large writes.
+    settled = [True] * len(df)
+    for _, _, rows in work:
+        for pos, _ in rows:
+            settled[pos] = False
+    ready, cursor = {}, 0
+    with open(CANDIDATES_JSONL, "wb", buffering=4 << 20) as fout, \
+            (nullcontext(pool) if pool else ProcessPoolExecutor()) as ex:
+        for (_, _, rows), done in zip(work, ex.map(process_pdf, work)):
+            for pos, _ in rows:
+                settled[pos] = True
+            ready.update(done)
+            while cursor < len(settled) and settled[cursor]:
+                line = ready.pop(cursor, None)
+                if line is not None:
+                    fout.write(line)
+                cursor += 1
     print(f"[OK] wrote candidates to {CANDIDATES_JSONL}")
 
 if __name__ == "__main__":
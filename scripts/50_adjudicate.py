@@ -5,30 +5,27 @@ Adjudicate claims -> write ONLY outputs/adjudications_with_rewrites.csv (no adju
 Columns include empty rewrite fields that 52_propose_rewrites.py will fill in-place.
 """
 
-import csv, json, sys
+import csv, copy, json, os, sys, tempfile
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List
-from jinja2 import Template
-import yaml
+from typing import Dict, Any, Iterator, List
+import orjson
 from tqdm import tqdm
 
 sys.path.insert(0, str(Path("src").resolve()))
-from audit_lib.llm import _load_file, openai_call  # uses your existing helpers
+from audit_lib.config import get_config
+from audit_lib.llm import _load_file, load_template, cached_openai_call, rate_limiter_from_config  # uses your existing helpers
 
-CFG = yaml.safe_load(open("config/config.yaml","r",encoding="utf-8"))
-
-OUT_DIR = Path(CFG["paths"]["outputs_dir"])
-INPUTS_JSONL = OUT_DIR / "adjudication_inputs.jsonl"
 PROMPTS_DIR = Path("prompts")
 
 SYSTEM_PATH = PROMPTS_DIR / "adjudicator_system.txt"
 USER_TMPL   = PROMPTS_DIR / "adjudicator_user.jinja"
+CLAIM_TMPL  = PROMPTS_DIR / "adjudicator_claim.jinja"
+BATCH_TMPL  = PROMPTS_DIR / "adjudicator_batch_user.jinja"
 SCHEMA_PATH = PROMPTS_DIR / "adjudicator_json_schema.json"
-
-MODEL = CFG["llm"]["model"]
-TEMP  = float(CFG["llm"]["temperature"])
-
-CONSOLIDATED = OUT_DIR / "adjudications_with_rewrites.csv"
+PROMPT_CACHE_KEY = "citation-audit-adjudicator"
 
 BASE_COLS = [
     "review_id","section","claim_id","claim_text",
@@ -38,84 +35,153 @@ BASE_COLS = [
 REWRITE_COLS = ["proposed_rewrite","page_anchor","rewrite_notes","rewrite_flags"]
 ALL_COLS = BASE_COLS + REWRITE_COLS
 
-def read_inputs(path: Path) -> List[Dict[str,Any]]:
-    rows = []
-    with open(path, "r", encoding="utf-8") as f:
+def iter_inputs(path: Path) -> Iterator[Dict[str,Any]]:
+    with open(path, "rb") as f:
         for line in f:
-            s = line.strip()
-            if not s:
-                continue
-            rows.append(json.loads(s))
-    return rows
-
-def main():
-    if not INPUTS_JSONL.exists():
-        print(f"ERROR: {INPUTS_JSONL} not found. Ensure retrieval produced it.", file=sys.stderr)
-        sys.exit(2)
+            if line.strip():
+                yield orjson.loads(line)
+
+def iter_batches(items, size: int) -> Iterator[List[Dict[str,Any]]]:
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+def batch_schema(schema: Dict[str,Any]) -> Dict[str,Any]:
+    # {"results": [<per-claim schema + claim_id>, ...]}; json_object mode needs an object at the top
+    item = copy.deepcopy(schema)
+    item.setdefault("properties", {})["claim_id"] = {"type": "string"}
+    item["required"] = list(item.get("required", [])) + ["claim_id"]
+    return {"type": "object", "properties": {"results": {"type": "array", "items": item}},
+            "required": ["results"], "additionalProperties": False}
+
+def _llm_error(e: Exception) -> Dict[str,Any]:
+    # On failure, emit UNSUPPORTED with a flag so pipeline continues
+    return {
+        "verdict": "UNSUPPORTED_FAIL",
+        "rationale": f"LLM error: {e}",
+        "evidence_span": "",
+        "required_fix": None,
+        "risk_flags": ["llm_error"]
+    }
+
+def _coalesce(v) -> str:
+    return "" if v is None else v
+
+def _join_flags(flags) -> str:
+    return ";".join(flags if isinstance(flags, list) else [str(flags)])
+
+def build_ctx(x: Dict[str,Any]) -> Dict[str,Any]:
+    return dict(
+        claim_text=x.get("claim_text",""),
+        citation_text=x.get("citation_text",""),
+        citation_type=x.get("citation_type",""),
+        is_secondary=x.get("is_secondary", False),
+        primary_mentioned_author=x.get("primary_mentioned_author") or "",
+        primary_mentioned_year=x.get("primary_mentioned_year") or "",
+        stated_page=x.get("stated_page") or "",
+        source_author=x.get("citation_author",""),
+        source_year=x.get("citation_year",""),
+        source_pdf_path=x.get("source_pdf_path",""),
+        evidence=x.get("evidence", []) or []
+    )
+
+def build_row(x: Dict[str,Any], res: Dict[str,Any]) -> Dict[str,Any]:
+    return {
+        "review_id": x.get("review_id",""),
+        "section": x.get("section",""),
+        "claim_id": x.get("claim_id",""),
+        "claim_text": x.get("claim_text",""),
+        "citation_author": x.get("citation_author",""),
+        "citation_year": x.get("citation_year",""),
+        "source_pdf_path": x.get("source_pdf_path",""),
+        "verdict": res.get("verdict",""),
+        "rationale": res.get("rationale",""),
+        "evidence_span": res.get("evidence_span",""),
+        "required_fix": _coalesce(res.get("required_fix")),
+        "risk_flags": _join_flags(res.get("risk_flags", [])),
+        # rewrite fields are left out; the writer pads them with "" (restval)
+    }
+
+def main(cfg=None) -> int:
+    cfg = cfg or get_config()
+    out_dir = Path(cfg["paths"]["outputs_dir"])
+    inputs_jsonl = out_dir / "adjudication_inputs.jsonl"
+    consolidated = out_dir / "adjudications_with_rewrites.csv"
+    cache_dir = out_dir / ".llm_cache"
+    model = cfg["llm"]["model"]
+    max_tokens = int(cfg["llm"].get("max_output_tokens", 800))
+
+    if not inputs_jsonl.exists():
+        print(f"ERROR: {inputs_jsonl} not found. Ensure retrieval produced it.", file=sys.stderr)
+        return 2
 
     system_prompt = _load_file(SYSTEM_PATH)
-    user_template = Template(_load_file(str(USER_TMPL)))
+    user_template = load_template(USER_TMPL)
     schema = json.loads(_load_file(SCHEMA_PATH))
 
-    inputs = read_inputs(INPUTS_JSONL)
-    out_rows: List[Dict[str,Any]] = []
-
-    for x in tqdm(inputs, desc="Adjudicating"):
-        ctx = dict(
-            claim_text=x.get("claim_text",""),
-            citation_text=x.get("citation_text",""),
-            citation_type=x.get("citation_type",""),
-            is_secondary=x.get("is_secondary", False),
-            primary_mentioned_author=x.get("primary_mentioned_author") or "",
-            primary_mentioned_year=x.get("primary_mentioned_year") or "",
-            stated_page=x.get("stated_page") or "",
-            source_author=x.get("citation_author",""),
-            source_year=x.get("citation_year",""),
-            source_pdf_path=x.get("source_pdf_path",""),
-            evidence=x.get("evidence", []) or []
-        )
-        user_prompt = user_template.render(**ctx)
+    workers = int((cfg.get("runtime") or {}).get("concurrency", 1))
+    batch_size = max(1, int((cfg.get("adjudication") or {}).get("batch_size", 1)))
+    limiter = rate_limiter_from_config(cfg)
+    if batch_size > 1:
+        batch_template = load_template(BATCH_TMPL)
+        claim_template = load_template(CLAIM_TMPL)
+        schema_n = batch_schema(schema)
 
+    def call(user_prompt: str, json_schema: Dict[str,Any], n_claims: int = 1) -> Dict[str,Any]:
         try:
-            res = openai_call(MODEL, system_prompt, user_prompt, schema)
+            return cached_openai_call(cache_dir, model, system_prompt, user_prompt, json_schema, max_tokens=max_tokens * n_claims,
+                                      limiter=limiter, prompt_cache_key=PROMPT_CACHE_KEY)
         except Exception as e:
-            # On failure, emit UNSUPPORTED with a flag so pipeline continues
-            res = {
-                "verdict": "UNSUPPORTED_FAIL",
-                "rationale": f"LLM error: {e}",
-                "evidence_span": "",
-                "required_fix": None,
-                "risk_flags": ["llm_error"]
-            }
-
-        row = {
-            "review_id": x.get("review_id",""),
-            "section": x.get("section",""),
-            "claim_id": x.get("claim_id",""),
-            "claim_text": x.get("claim_text",""),
-            "citation_author": x.get("citation_author",""),
-            "citation_year": x.get("citation_year",""),
-            "source_pdf_path": x.get("source_pdf_path",""),
-            "verdict": res.get("verdict",""),
-            "rationale": res.get("rationale",""),
-            "evidence_span": res.get("evidence_span",""),
-            "required_fix": (res.get("required_fix") if res.get("required_fix") is not None else ""),
-            "risk_flags": ";".join(res.get("risk_flags", []) if isinstance(res.get("risk_flags", []), list) else [str(res.get("risk_flags"))]),
-            # rewrite fields start empty
-            "proposed_rewrite": "",
-            "page_anchor": "",
-            "rewrite_notes": "",
-            "rewrite_flags": ""
-        }
-        out_rows.append(row)
-
-    CONSOLIDATED.parent.mkdir(parents=True, exist_ok=True)
-    with open(CONSOLIDATED, "w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=ALL_COLS)
-        w.writeheader()
-        for r in out_rows:
-            w.writerow(r)
-    print(f"[OK] wrote consolidated adjudications -> {CONSOLIDATED}")
+            return _llm_error(e)
+
+    def adjudicate(batch: List[Dict[str,Any]]) -> List[Dict[str,Any]]:
+        ctxs = [build_ctx(x) for x in batch]
+        if len(batch) > 1:
+            # Several claims per request: RPM-bound becomes TPM-bound. Items carry only the
+            # per-claim part; the shared TASK/OUTPUT FORMAT block is rendered once per batch.
+            items = [{"claim_id": str(x.get("claim_id","")), "prompt": claim_template.render(**c)} for x, c in zip(batch, ctxs)]
+            results = call(batch_template.render(items=items), schema_n, len(batch)).get("results")
+            if (isinstance(results, list) and len(results) == len(batch)
+                    and all(isinstance(r, dict) and str(r.get("claim_id","")) == it["claim_id"] for r, it in zip(results, items))):
+                return [build_row(x, r) for x, r in zip(batch, results)]
+            # Malformed batch answer: fall back to one request per claim
+        return [build_row(x, call(user_template.render(**c), schema)) for x, c in zip(batch, ctxs)]
+
+    # Calls are network-bound; overlap them on threads. Only a small window of batches is
+    # in flight at once, so inputs are parsed as the window advances rather than up front;
+    # results are written in input order as the oldest batch finishes.
+    # Rows stream into a sibling temp file that replaces the CSV only once every claim is done,
+    # so an interrupted run leaves the previous complete file in place
+    consolidated.parent.mkdir(parents=True, exist_ok=True)
+    workers = max(1, workers)
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", newline="", dir=consolidated.parent,
+                                     prefix=consolidated.name + ".", suffix=".tmp", delete=False) as f:
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as ex, tqdm(desc="Adjudicating", unit="claim") as bar:
+                w = csv.DictWriter(f, fieldnames=ALL_COLS, restval="")
+                w.writeheader()
+                pending = deque()
+                for batch in iter_batches(iter_inputs(inputs_jsonl), batch_size):
+                    if len(pending) >= 2 * workers:
+                        rows = pending.popleft().result()
+                        w.writerows(rows)
+                        bar.update(len(rows))
+                    pending.append(ex.submit(adjudicate, batch))
+                while pending:
+                    rows = pending.popleft().result()
+                    w.writerows(rows)
+                    bar.update(len(rows))
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    try:
+        os.replace(f.name, consolidated)
+    except BaseException:
+        os.unlink(f.name)
+        raise
+    print(f"[OK] wrote consolidated adjudications -> {consolidated}")
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(main())
\ No newline at end of file
@@ -6,106 +6,146 @@ outputs/adjudications_with_rewrites.csv  (in-place).
 Optionally also emit outputs/proposed_rewrites.csv with --emit-proposed.
 """
 
-import csv, json, sys, argparse
+import csv, json, os, sys, argparse, tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Any
-from jinja2 import Template
-import yaml
+import orjson
 
 # Make sure we can import from src/
 sys.path.insert(0, str(Path("src").resolve()))
-from audit_lib.llm import _load_file, openai_call  # your existing helper
+from audit_lib.config import get_config
+from audit_lib.llm import _load_file, load_template, cached_openai_call, batch_fill_cache, rate_limiter_from_config  # your existing helper
 
 # ---------- Config ----------
-CFG = yaml.safe_load(open("config/config.yaml","r",encoding="utf-8"))
-
-OUT_DIR = Path(CFG["paths"]["outputs_dir"])
-ENRICHED = OUT_DIR / "ccp_registry_enriched.csv"
-INPUTS_JSONL = OUT_DIR / "adjudication_inputs.jsonl"
-CONSOLIDATED = OUT_DIR / "adjudications_with_rewrites.csv"
-
 PROMPTS_DIR = Path("prompts")
 SYSTEM_PATH = PROMPTS_DIR / "rewriter_system.txt"
 USER_TMPL   = PROMPTS_DIR / "rewriter_user.jinja"
 SCHEMA_PATH = PROMPTS_DIR / "rewriter_json_schema.json"
-
-MODEL = (CFG.get("rewriter", {}) or {}).get("model", CFG["llm"]["model"])
-TEMP  = float((CFG.get("rewriter", {}) or {}).get("temperature", CFG["llm"]["temperature"]))
-MAX_EXCERPTS = int((CFG.get("rewriter", {}) or {}).get("max_excerpts", 6))
+PROMPT_CACHE_KEY = "citation-audit-rewriter"
+REWRITE_COLS = ["proposed_rewrite","page_anchor","rewrite_notes","rewrite_flags"]
+PROPOSED_COLS = ["review_id","claim_id","proposed_rewrite","page_anchor","source_pdf_path",
+                 "section_title","research_question","notes","risk_flags"]
 
 # ---------- IO helpers ----------
 def read_csv_dict(path: Path) -> List[Dict[str,str]]:
     with open(path, "r", encoding="utf-8-sig", newline="") as f:
         return list(csv.DictReader(f))
 
+def read_csv_index(path: Path, wanted: set) -> Dict[tuple,Dict[str,str]]:
+    # Stream the file and keep only the (review_id, claim_id) rows that will be used
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        return {k: r for r in csv.DictReader(f) if (k := (r.get("review_id",""), r.get("claim_id",""))) in wanted}
+
 def write_csv(path: Path, rows: List[Dict[str,Any]], cols: List[str]) -> None:
+    # Write to a sibling temp file and swap it in, so readers never see a half-written CSV
     path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8", newline="") as f:
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", newline="", dir=path.parent,
+                                     prefix=path.name + ".", suffix=".tmp", delete=False) as f:
         w = csv.DictWriter(f, fieldnames=cols)
         w.writeheader()
-        for r in rows:
-            w.writerow(r)
-
-def read_inputs_jsonl(path: Path) -> Dict[str,Dict]:
+        w.writerows(rows)
+    try:
+        os.replace(f.name, path)
+    except BaseException:
+        os.unlink(f.name)
+        raise
+
+def read_inputs_jsonl(path: Path, wanted: set) -> Dict[str,Dict]:
     m: Dict[str,Dict] = {}
-    with open(path, "r", encoding="utf-8") as f:
+    with open(path, "rb") as f:
         for line in f:
-            s = line.strip()
-            if not s: continue
-            obj = json.loads(s)
+            if not line.strip(): continue
+            obj = orjson.loads(line)
             cid = str(obj.get("claim_id",""))
-            if cid: m[cid] = obj
+            if cid in wanted: m[cid] = obj
     return m
 
+def clip_to_schema(res: Dict[str,Any], schema: Dict[str,Any]) -> Dict[str,Any]:
+    # json_object mode never sends the schema, so its maxLength/maxItems are applied here.
+    # An overlong string is cut back to a word boundary and flagged "<field>_truncated".
+    out = dict(res)
+    truncated = []
+    for key, spec in (schema.get("properties") or {}).items():
+        v = out.get(key)
+        if isinstance(v, str) and "maxLength" in spec and len(v := v.strip()) > spec["maxLength"]:
+            n = spec["maxLength"]
+            cut = v[:n]
+            if not v[n].isspace() and " " in cut:
+                cut = cut.rsplit(None, 1)[0]
+            out[key] = cut.rstrip()
+            truncated.append(key)
+        elif isinstance(v, list) and "maxItems" in spec:
+            out[key] = v[:spec["maxItems"]]
+    if truncated:
+        rf = out.get("risk_flags") or []
+        out["risk_flags"] = ([rf] if isinstance(rf, str) else list(rf)) + [f"{k}_truncated" for k in truncated]
+    return out
+
 # ---------- Main ----------
-def main():
+def main(cfg=None, argv=None) -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--limit", type=int, default=0, help="Max UNSUPPORTED_FAIL rows to process")
     ap.add_argument("--only-review", type=str, default="", help="Process a single review_id")
     ap.add_argument("--emit-proposed", action="store_true", help="Also write outputs/proposed_rewrites.csv")
-    args = ap.parse_args()
+    ap.add_argument("--batch", action="store_true", help="Answer uncached prompts via the OpenAI Batch API (half price, up to 24 h) before filling rows")
+    args = ap.parse_args(argv)
+
+    cfg = cfg or get_config()
+    rw_cfg = cfg.get("rewriter", {}) or {}
+    out_dir = Path(cfg["paths"]["outputs_dir"])
+    enriched_csv = out_dir / "ccp_registry_enriched.csv"
+    inputs_jsonl = out_dir / "adjudication_inputs.jsonl"
+    consolidated_csv = out_dir / "adjudications_with_rewrites.csv"
+    cache_dir = out_dir / ".llm_cache"
+    model = rw_cfg.get("model", cfg["llm"]["model"])
+    max_excerpts = int(rw_cfg.get("max_excerpts", 6))
+    # Output tokens dominate latency here; the prompt asks for a short rewrite, so cap the budget too
+    max_tokens = int(rw_cfg.get("max_output_tokens", 300))
 
     # Preconditions
-    if not CONSOLIDATED.exists():
-        print(f"ERROR: {CONSOLIDATED} not found. Run 50_adjudicate.py first.", file=sys.stderr)
-        sys.exit(2)
-    if not ENRICHED.exists():
-        print(f"ERROR: {ENRICHED} not found. Run enrichment first.", file=sys.stderr)
-        sys.exit(2)
-    if not INPUTS_JSONL.exists():
-        print(f"ERROR: {INPUTS_JSONL} not found. Ensure retrieval produced it.", file=sys.stderr)
-        sys.exit(2)
+    if not consolidated_csv.exists():
+        print(f"ERROR: {consolidated_csv} not found. Run 50_adjudicate.py first.", file=sys.stderr)
+        return 2
+    if not enriched_csv.exists():
+        print(f"ERROR: {enriched_csv} not found. Run enrichment first.", file=sys.stderr)
+        return 2
+    if not inputs_jsonl.exists():
+        print(f"ERROR: {inputs_jsonl} not found. Ensure retrieval produced it.", file=sys.stderr)
+        return 2
     for p in (SYSTEM_PATH, USER_TMPL, SCHEMA_PATH):
         if not p.exists():
             print(f"ERROR: Missing prompt file: {p}. Create it under prompts/ as instructed.", file=sys.stderr)
-            sys.exit(2)
+            return 2
 
-    consolidated = read_csv_dict(CONSOLIDATED)
-    enriched_rows = read_csv_dict(ENRICHED)
-    enriched = {(r.get("review_id",""), r.get("claim_id","")): r for r in enriched_rows}
-    inputs_by_claim = read_inputs_jsonl(INPUTS_JSONL)
+    consolidated = read_csv_dict(consolidated_csv)
+    targets = [r for r in consolidated
+               if r.get("verdict","") == "UNSUPPORTED_FAIL"
+               and (not args.only_review or r.get("review_id","") == args.only_review)]
+    if args.limit and len(targets) > args.limit:
+        targets = targets[:args.limit]
+    if not targets:
+        print(f"[OK] no UNSUPPORTED_FAIL rows to rewrite; {consolidated_csv} left untouched")
+        if args.emit_proposed:
+            write_csv(out_dir / "proposed_rewrites.csv", [], PROPOSED_COLS)
+        return 0
+
+    enriched = read_csv_index(enriched_csv, {(r.get("review_id",""), r.get("claim_id","")) for r in targets})
+    inputs_by_claim = read_inputs_jsonl(inputs_jsonl, {r.get("claim_id","") for r in targets} - {""})
 
     system_prompt = _load_file(SYSTEM_PATH)
-    user_template = Template(_load_file(str(USER_TMPL)))
+    user_template = load_template(USER_TMPL)
     schema = json.loads(_load_file(SCHEMA_PATH))
 
-    targets = [r for r in consolidated if r.get("verdict","") == "UNSUPPORTED_FAIL"]
-    if args.only_review:
-        targets = [r for r in targets if r.get("review_id","") == args.only_review]
-    if args.limit and len(targets) > args.limit:
-        targets = targets[:args.limit]
+    limiter = rate_limiter_from_config(cfg)
 
-    # Index consolidated by (review_id, claim_id) to update rows in-place
-    index = {(r.get("review_id",""), r.get("claim_id","")): i for i, r in enumerate(consolidated)}
-    proposed_rows = []
-
-    for row in targets:
+    def context(row: Dict[str,Any]) -> Dict[str,Any]:
         rid = row.get("review_id",""); cid = row.get("claim_id","")
         enr = enriched.get((rid, cid), {})
         inp = inputs_by_claim.get(cid, {})
 
-        evidence = (inp.get("evidence", []) or [])[:MAX_EXCERPTS]
-        ctx = dict(
+        evidence = (inp.get("evidence", []) or [])[:max_excerpts]
+        return dict(
             research_question=enr.get("research_question",""),
             section_title=enr.get("section_title") or enr.get("section_canonical",""),
             claim_text=enr.get("claim_text","") or row.get("claim_text",""),
@@ -115,44 +155,60 @@ def main():
             evidence=evidence
         )
 
-        # Render + call LLM
-        user_msg = user_template.render(**ctx)
+    ctxs = [context(row) for row in targets]
+    user_msgs = [user_template.render(**ctx) for ctx in ctxs]
+    if args.batch:
+        # Offline turnaround is fine here: the batch only warms the cache, and the pass below
+        # reads from it (anything the batch could not answer goes out as an online call)
+        n = batch_fill_cache(cache_dir, model, system_prompt, user_msgs, schema, max_tokens=max_tokens, prompt_cache_key=PROMPT_CACHE_KEY)
+        print(f"[OK] batch answered {n} prompt(s)")
+
+    # targets holds the consolidated row dicts themselves, so filling a target updates consolidated in-place
+    def propose(row: Dict[str,Any], ctx: Dict[str,Any], user_msg: str) -> Dict[str,Any]:
         try:
-            res = openai_call(MODEL, system_prompt, user_msg, schema) or {}
+            res = clip_to_schema(cached_openai_call(cache_dir, model, system_prompt, user_msg, schema, max_tokens=max_tokens, limiter=limiter, prompt_cache_key=PROMPT_CACHE_KEY) or {}, schema)
         except Exception as e:
             res = {"proposed_rewrite":"", "page_anchor":"", "notes":f"LLM error: {e}", "risk_flags":["llm_error"]}
 
         # Update in-place
-        idx = index[(rid, cid)]
-        consolidated[idx]["proposed_rewrite"] = (res.get("proposed_rewrite") or "").strip()
-        consolidated[idx]["page_anchor"] = (res.get("page_anchor") or "").strip()
-        consolidated[idx]["rewrite_notes"] = res.get("notes","")
+        row["proposed_rewrite"] = (res.get("proposed_rewrite") or "").strip()
+        row["page_anchor"] = (res.get("page_anchor") or "").strip()
+        row["rewrite_notes"] = res.get("notes","")
         rf = res.get("risk_flags", [])
         if isinstance(rf, str): rf = [rf]
-        consolidated[idx]["rewrite_flags"] = ";".join(rf or [])
+        row["rewrite_flags"] = ";".join(rf or [])
 
-        proposed_rows.append({
-            "review_id": rid, "claim_id": cid,
-            "proposed_rewrite": consolidated[idx]["proposed_rewrite"],
-            "page_anchor": consolidated[idx]["page_anchor"],
-            "source_pdf_path": consolidated[idx].get("source_pdf_path",""),
+        return {
+            "review_id": row.get("review_id",""), "claim_id": row.get("claim_id",""),
+            "proposed_rewrite": row["proposed_rewrite"],
+            "page_anchor": row["page_anchor"],
+            "source_pdf_path": row.get("source_pdf_path",""),
             "section_title": ctx["section_title"],
             "research_question": ctx["research_question"],
-            "notes": consolidated[idx]["rewrite_notes"],
-            "risk_flags": consolidated[idx]["rewrite_flags"],
-        })
-
-    # Write back the SAME consolidated file (preserve original column order)
-    cols = list(consolidated[0].keys()) if consolidated else []
-    write_csv(CONSOLIDATED, consolidated, cols)
-    print(f"[OK] updated in-place -> {CONSOLIDATED}")
+            "notes": row["rewrite_notes"],
+            "risk_flags": row["rewrite_flags"],
+        }
+
+    # Calls are network-bound and each touches only its own row; map() keeps target order
+    before = [tuple(r.get(c) for c in REWRITE_COLS) for r in targets]
+    workers = int((cfg.get("runtime") or {}).get("concurrency", 1))
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        proposed_rows = list(ex.map(propose, targets, ctxs, user_msgs))
+
+    # Write back the SAME consolidated file (preserve original column order), but only
+    # when a rewrite field actually changed; a re-run served from the cache is a no-op
+    cols = list(consolidated[0].keys())
+    if before != [tuple(r.get(c) for c in REWRITE_COLS) for r in targets] or not set(REWRITE_COLS) <= set(cols):
+        write_csv(consolidated_csv, consolidated, cols + [c for c in REWRITE_COLS if c not in cols])
+        print(f"[OK] updated in-place -> {consolidated_csv}")
+    else:
+        print(f"[OK] rewrites unchanged; {consolidated_csv} left untouched")
 
     if args.emit_proposed:
-        proposed = OUT_DIR / "proposed_rewrites.csv"
-        write_csv(proposed, proposed_rows,
-                  ["review_id","claim_id","proposed_rewrite","page_anchor","source_pdf_path",
-                   "section_title","research_question","notes","risk_flags"])
+        proposed = out_dir / "proposed_rewrites.csv"
+        write_csv(proposed, proposed_rows, PROPOSED_COLS)
         print(f"[OK] wrote -> {proposed}")
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(main())
\ No newline at end of file
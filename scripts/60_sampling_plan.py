@@ -1,8 +1,17 @@
+import sys
+import numpy as np
 import pandas as pd
-import yaml
 from pathlib import Path
 
-CONFIG = yaml.safe_load(open("config/config.yaml","r",encoding="utf-8"))
+# Runnable as `python scripts/<name>.py` from the repo root: audit_lib lives in src/,
+# scripts.util is imported from the root
+sys.path[:0] = [str(Path(".").resolve()), str(Path("src").resolve())]
+from audit_lib.config import get_config
+from scripts.util.guards import safe_write_csv
+from scripts.util.io import load_adjudications
+from scripts.util.schema import BAD_VERDICTS
+
+CONFIG = get_config()
 OUT_DIR = Path(CONFIG["paths"]["outputs_dir"])
 
 CCP = OUT_DIR/"ccp_registry.csv"
@@ -12,38 +21,43 @@ PLAN = OUT_DIR/"sampling_plan.csv"
 LOW_SAMPLE_FRACTION = 0.3
 FAIL_REVIEW_ESCALATE_THRESHOLD = 0.05
 
+KEYS = ["review_id","section"]
+PLAN_COLS = ["review_id","section","claim_id","priority","escalate_to_full_section"]
+
 def main():
-    ccp = pd.read_csv(CCP)
-    adj = pd.read_csv(ADJ) if ADJ.exists() else pd.DataFrame(columns=["claim_id","verdict","section","review_id"])
+    # Only the columns the plan needs; the claim text etc. is never parsed into objects
+    ccp = pd.read_csv(CCP, usecols=KEYS + ["claim_id","priority"], dtype={"priority": "category"})
+    adj = load_adjudications(ADJ, usecols=KEYS + ["verdict"]) if ADJ.exists() else pd.DataFrame(columns=["claim_id","verdict","section","review_id"])
 
+    # bad_rate indexed by (review_id, section): a hash lookup per plan row, no merge frame
     if not adj.empty:
-        adj["is_bad"] = adj["verdict"].isin(["UNSUPPORTED_FAIL","AMBIGUOUS_REVIEW"])
-        rates = adj.groupby(["review_id","section"])["is_bad"].mean().reset_index().rename(columns={"is_bad":"bad_rate"})
+        rates = adj["verdict"].isin(BAD_VERDICTS).groupby([adj[k] for k in KEYS], observed=True).mean()
     else:
-        rates = pd.DataFrame(columns=["review_id","section","bad_rate"])
-
-    plan_rows = []
-    for (rid, sec), group in ccp.groupby(["review_id","section"]):
-        high = group[group["priority"]=="High"]
-        low  = group[group["priority"]=="Low"]
-
-        n_sample = max(10, int(len(low)*LOW_SAMPLE_FRACTION)) if len(low)>0 else 0
-        low_sample = low.sample(n=min(n_sample, len(low)), random_state=42) if n_sample>0 else low.iloc[0:0]
-
-        bad_rate = rates[(rates["review_id"]==rid)&(rates["section"]==sec)]["bad_rate"]
-        escalate = (not bad_rate.empty) and (bad_rate.values[0] > FAIL_REVIEW_ESCALATE_THRESHOLD)
-        include = pd.concat([high, low_sample], ignore_index=True)
-        include["escalate_to_full_section"] = bool(escalate)
-        for _, r in include.iterrows():
-            plan_rows.append({
-                "review_id": rid,
-                "section": sec,
-                "claim_id": r["claim_id"],
-                "priority": r["priority"],
-                "escalate_to_full_section": bool(escalate)
-            })
-
-    pd.DataFrame(plan_rows).to_csv(PLAN, index=False)
+        rates = pd.Series(dtype=float, index=pd.MultiIndex.from_tuples([], names=KEYS))
+
+    ccp = ccp.dropna(subset=KEYS)  # groupby drops NaN keys; keep the same rows
+    ccp["_order"] = range(len(ccp))
+    high = ccp[ccp["priority"]=="High"].assign(_part=0)
+    low  = ccp[ccp["priority"]=="Low"]
+    # df.sample(n, random_state=42) takes the first n of RandomState(42).permutation(len(group)),
+    # which depends only on the group size: one permutation per distinct size reproduces the
+    # old per-section draws exactly, with no Python loop over the sections themselves
+    grp = low.groupby(KEYS)
+    pos = grp.cumcount().to_numpy()
+    size = grp["priority"].transform("size").to_numpy()
+    rank = np.empty(len(low), dtype=np.int64)
+    for n in np.unique(size):
+        m = size == n
+        rank[m] = np.argsort(np.random.RandomState(42).permutation(n))[pos[m]]
+    n_sample = np.minimum(np.maximum(10, (size*LOW_SAMPLE_FRACTION).astype(int)), size)
+    keep = rank < n_sample
+    low_sample = low[keep].assign(_part=1, _order=rank[keep])
+
+    plan = pd.concat([high, low_sample]).sort_values(KEYS + ["_part","_order"], kind="stable")
+    bad_rate = rates.reindex(pd.MultiIndex.from_frame(plan[KEYS]))
+    plan["escalate_to_full_section"] = (bad_rate > FAIL_REVIEW_ESCALATE_THRESHOLD).to_numpy()
+
+    safe_write_csv(plan[PLAN_COLS], PLAN)
     print(f"[OK] wrote sampling plan -> {PLAN}")
 
 if __name__ == "__main__":
@@ -2,20 +2,19 @@
 # -*- coding: utf-8 -*-
 from pathlib import Path
 import sys, csv
-from audit_lib.enrich import enrich_registry_rows, write_enriched_csv
-
-def _read_csv(path: Path):
-    with open(path, "r", encoding="utf-8-sig", newline="") as f:
-        return list(csv.DictReader(f))
+from audit_lib.enrich import iter_enriched_rows, write_enriched_csv
 
 def main():
     if len(sys.argv) < 5:
         print("Usage: python scripts/65_enrich_registry.py <in_csv> <reviews_dir> <out_csv> <qa_dir>")
         sys.exit(2)
     in_csv = Path(sys.argv[1]); reviews_dir = Path(sys.argv[2]); out_csv = Path(sys.argv[3])
-    rows = _read_csv(in_csv)
-    enriched = enrich_registry_rows(rows, reviews_dir)
-    write_enriched_csv(enriched, out_csv)
+    with open(in_csv, "r", encoding="utf-8-sig", newline="") as f:
+        rows = csv.DictReader(f)
+        if out_csv.resolve() == in_csv.resolve():
+            rows = list(rows)  # rewriting in place: read everything before the output truncates it
+        # Otherwise rows stream from the reader through enrichment to the writer, one at a time
+        write_enriched_csv(iter_enriched_rows(rows, reviews_dir), out_csv)
     print(f"[OK] wrote enriched registry -> {out_csv}")
 
 if __name__ == "__main__":
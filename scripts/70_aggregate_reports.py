@@ -1,27 +1,48 @@
-import pandas as pd
-import yaml
+import sys
 from pathlib import Path
 
-CONFIG = yaml.safe_load(open("config/config.yaml","r",encoding="utf-8"))
+# Runnable as `python scripts/<name>.py` from the repo root: audit_lib lives in src/,
+# scripts.util is imported from the root
+sys.path[:0] = [str(Path(".").resolve()), str(Path("src").resolve())]
+from audit_lib.config import get_config
+
+CONFIG = get_config()
 OUT_DIR = Path(CONFIG["paths"]["outputs_dir"])
 
 ADJ = OUT_DIR/"adjudications.csv"
 DASH = OUT_DIR/"summary_dashboard.csv"
+DASH_COLS = ["verdict","count","level","review_id","section"]
 
 def main():
     if not ADJ.exists():
         print("No adjudications.csv found.")
         return
-    df = pd.read_csv(ADJ)
-    counts = df["verdict"].value_counts().rename_axis("verdict").reset_index(name="count")
-    by_review = df.groupby(["review_id","verdict"]).size().reset_index(name="count")
-    by_section = df.groupby(["review_id","section","verdict"]).size().reset_index(name="count")
+    import pandas as pd
+    from scripts.util.guards import safe_write_csv
+    from scripts.util.io import load_adjudications
+    df = load_adjudications(ADJ, usecols=["review_id","section","verdict"])
+    # One pass over the rows: count each (review, section, verdict) cell once, then roll the
+    # review and overall levels up from those few cells instead of rescanning the frame.
+    # NaN keys are kept here and dropped per level exactly where groupby/value_counts dropped them;
+    # observed=True because the keys come back categorical (no empty cartesian-product cells).
+    cells = df.groupby(["review_id","section","verdict"], sort=False, dropna=False, observed=True).size()
+    complete = cells.index.to_frame(index=False).notna().all(axis=1).to_numpy()
+    # Sort on the key columns, not the index: with dropna=False pandas 2.x keeps NaN inside the
+    # (unsorted) levels, and sort_index then orders by level position rather than by value
+    by_section = (cells[complete].reset_index(name="count")
+                  .sort_values(["review_id","section","verdict"], kind="stable", ignore_index=True))
+    by_review = cells.groupby(level=["review_id","verdict"], observed=True).sum().reset_index(name="count")
+    counts = (cells.groupby(level="verdict", sort=False, observed=True).sum().sort_values(ascending=False)
+                   .rename_axis("verdict").reset_index(name="count"))
 
-    counts["level"] = "overall"
-    by_review["level"] = "review"
-    by_section["level"] = "section"
+    # Give all three levels the same columns, in the output order, so concat just stacks
+    # them instead of computing a column union and reindexing each block
+    nan = float("nan")
+    counts = counts.assign(level="overall", review_id=nan, section=nan)[DASH_COLS]
+    by_review = by_review.assign(level="review", section=nan)[DASH_COLS]
+    by_section = by_section.assign(level="section")[DASH_COLS]
     out = pd.concat([counts, by_review, by_section], ignore_index=True)
-    out.to_csv(DASH, index=False)
+    safe_write_csv(out, DASH)
     print(f"[OK] wrote dashboard -> {DASH}")
 
 if __name__ == "__main__":
@@ -1,30 +1,40 @@
-import pandas as pd
-import yaml
+import sys
 from pathlib import Path
 
-CONFIG = yaml.safe_load(open("config/config.yaml","r",encoding="utf-8"))
+# Runnable as `python scripts/<name>.py` from the repo root: audit_lib lives in src/,
+# scripts.util is imported from the root
+sys.path[:0] = [str(Path(".").resolve()), str(Path("src").resolve())]
+from audit_lib.config import get_config
+
+CONFIG = get_config()
 OUT_DIR = Path(CONFIG["paths"]["outputs_dir"])
 
 ADJ = OUT_DIR/"adjudications.csv"
 CORR = OUT_DIR/"corrections_list.csv"
+ADJ_COLS = {"review_id","section","claim_id","verdict","required_fix","rationale"}
 
 def main():
     if not ADJ.exists():
         print("No adjudications.csv found.")
         return
-    df = pd.read_csv(ADJ)
-    df_bad = df[df["verdict"].isin(["UNSUPPORTED_FAIL","AMBIGUOUS_REVIEW"])].copy()
-    rows = []
-    for _, r in df_bad.iterrows():
-        rows.append({
-            "review_id": r["review_id"],
-            "section": r["section"],
-            "claim_id": r["claim_id"],
-            "action_type": "edit_or_remove",
-            "proposed_text": r.get("required_fix","") or "",
-            "notes": r.get("rationale","")
-        })
-    pd.DataFrame(rows).to_csv(CORR, index=False)
+    import pandas as pd
+    from scripts.util.guards import safe_write_csv
+    from scripts.util.io import load_adjudications
+    from scripts.util.schema import BAD_VERDICTS
+    # Only the columns below (optional ones included when present)
+    df = load_adjudications(ADJ, usecols=ADJ_COLS)
+    df_bad = df[df["verdict"].isin(BAD_VERDICTS)]
+    blank = pd.Series("", index=df_bad.index)
+    proposed = df_bad["required_fix"] if "required_fix" in df_bad else blank
+    # Built column-wise instead of one dict per row
+    safe_write_csv(pd.DataFrame({
+        "review_id": df_bad["review_id"],
+        "section": df_bad["section"],
+        "claim_id": df_bad["claim_id"],
+        "action_type": "edit_or_remove",
+        "proposed_text": proposed.fillna(""),
+        "notes": df_bad["rationale"] if "rationale" in df_bad else blank,
+    }), CORR)
     print(f"[OK] wrote corrections list -> {CORR}")
 
 if __name__ == "__main__":
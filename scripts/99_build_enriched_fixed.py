@@ -1,10 +1,14 @@
 import re
 import sys
 import glob
+import shutil
 import datetime as dt
+from collections import Counter, defaultdict
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple
 
+import numpy as np
 import pandas as pd
 
 from scripts.util.paths import (
@@ -22,17 +26,25 @@ from scripts.util.guards import ensure_columns, safe_write_csv
 
 VALID_PDF_EXTS = (".pdf",)
 
+_ETAL_RE = re.compile(r"\bet\s+al\.?,?\b", re.I)
+_NONWORD_RE = re.compile(r"[^\w\._]+")
+_UNDER_RE = re.compile(r"_+")
+_YEAR_RE = re.compile(r"((?:19|20)\d{2})")
+_TOKEN_RE = re.compile(r"[_\W]+")
+_QUOTE_RE = re.compile(r"[“”\"']")
+_DIGIT_RE = re.compile(r"\d")
+
 def _norm_text(s: str) -> str:
     s = (s or "").strip()
-    s = re.sub(r"\bet\s+al\.?,?\b", "", s, flags=re.I)  # remove 'et al.'
+    s = _ETAL_RE.sub("", s)                             # remove 'et al.'
     s = s.replace("-", "_")                             # hyphen→underscore
-    s = re.sub(r"[^\w\._]+", "_", s)                    # non-word→underscore
-    s = re.sub(r"_+", "_", s).strip("_")
+    s = _NONWORD_RE.sub("_", s)                         # non-word→underscore
+    s = _UNDER_RE.sub("_", s).strip("_")
     return s
 
 def _extract_year(s: str) -> str:
-    m = re.search(r"(19|20)\d{2}", s or "")
-    return m.group(0) if m else ""
+    m = _YEAR_RE.search(s or "")
+    return m.group(1) if m else ""
 
 def _list_all_pdfs() -> List[Path]:
     files = []
@@ -50,6 +62,18 @@ def _candidate_basenames(citation_text: str) -> List[str]:
     cands.append(lead_n)
     return cands
 
+def _tokens(x: str) -> frozenset:
+    return frozenset(t for t in _TOKEN_RE.split(_norm_text(x).lower()) if t)
+
+@lru_cache(maxsize=4)
+def _stem_index(files: Tuple[Path, ...]) -> Dict[str, List[int]]:
+    # token -> positions of the files whose stem contains it; built once per directory listing
+    postings = defaultdict(list)
+    for i, f in enumerate(files):
+        for t in _tokens(f.stem):
+            postings[t].append(i)
+    return postings
+
 def _best_match(cands: List[str], files: List[Path]) -> Optional[str]:
     if not files:
         return None
@@ -58,36 +82,71 @@ def _best_match(cands: List[str], files: List[Path]) -> Optional[str]:
     for c in cands:
         if c.lower() in basenames:
             return basenames[c.lower()]
-    # loose match: choose file whose normalized stem shares most tokens with candidate
-    def tnorm(x: str) -> List[str]:
-        return [t for t in re.split(r"[_\W]+", _norm_text(x).lower()) if t]
+    return _loose_match(cands, files)
+
+def _loose_match(cands: List[str], files: List[Path]) -> Optional[str]:
+    # loose match: choose file whose normalized stem shares most tokens with candidate.
+    # Scores come from the inverted index, so only files sharing a token are touched;
+    # ties still go to the first candidate, then the first file in listing order
+    postings = _stem_index(tuple(files))
     best: Tuple[int, Optional[str]] = (0, None)
     for cand in cands:
-        c_tokens = set(tnorm(cand))
-        for f in files:
-            f_tokens = set(tnorm(f.stem))
-            score = len(c_tokens & f_tokens)
-            if score > best[0]:
-                best = (score, f.name)
+        counts = Counter()
+        for t in _tokens(cand):
+            counts.update(postings.get(t, ()))
+        if not counts:
+            continue
+        score = max(counts.values())
+        if score > best[0]:
+            best = (score, files[min(i for i, n in counts.items() if n == score)].name)
     return best[1]
 
 def guess_pdf_from_citation(citation_text: str) -> Optional[str]:
-    cands = _candidate_basenames(citation_text)
+    # Single-citation form; columns should go through guess_pdfs, which lists the directory once
+    return _best_match(_candidate_basenames(citation_text), _list_all_pdfs())
+
+def guess_pdfs(citations: pd.Series) -> pd.Series:
+    """guess_pdf_from_citation for a whole column: one directory listing, candidates built with
+    .str ops over the distinct citations only, exact stems resolved by a dict join; only the
+    misses go to the token scorer."""
     files = _list_all_pdfs()
-    return _best_match(cands, files)
+    if not files:
+        return pd.Series(None, index=citations.index, dtype=object)
+    basenames = {f.stem.lower(): f.name for f in files}
+    full = citations.fillna("").astype(str)
+    # Many claims cite the same source; guess each distinct citation once and map back
+    ct = pd.Series(full.unique())
+    lead_n = (ct.str.split(",", n=1).str[0].str.strip()
+                .str.replace(_ETAL_RE, "", regex=True)
+                .str.replace("-", "_", regex=False)
+                .str.replace(_NONWORD_RE, "_", regex=True)
+                .str.replace(_UNDER_RE, "_", regex=True)
+                .str.strip("_"))
+    year = ct.str.extract(_YEAR_RE, expand=False).fillna("")
+    with_year = (lead_n + "_" + year).where(year != "")
+    guessed = with_year.str.lower().map(basenames).combine_first(lead_n.str.lower().map(basenames))
+    miss = guessed.isna()
+    if miss.any():
+        # The same source is cited many times; score each distinct candidate pair once
+        pairs = pd.Series(list(zip(with_year[miss], lead_n[miss])), index=guessed.index[miss])
+        scored = {p: _loose_match(([p[0]] if isinstance(p[0], str) else []) + [p[1]], files) for p in pairs.unique()}
+        guessed[miss] = pairs.map(scored)
+    return full.map(dict(zip(ct, guessed)))
 
 def fill_source_pdf(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
-    if "source_pdf" not in out.columns:
-        out["source_pdf"] = ""
-    mask_blank = out["source_pdf"].isna() | (out["source_pdf"].astype(str).str.strip() == "")
-    if "citation_text" not in out.columns:
+    # Only source_pdf changes, so fill that column on df itself rather than copying
+    # the whole frame again (main passes the copy ensure_required_columns made)
+    if "source_pdf" not in df.columns:
+        df["source_pdf"] = ""
+    src = df["source_pdf"]
+    if "citation_text" not in df.columns:
         # nothing we can do, just solidify blanks to ""
-        out["source_pdf"] = out["source_pdf"].fillna("")
-        return out
-    out.loc[mask_blank, "source_pdf"] = out.loc[mask_blank, "citation_text"].map(guess_pdf_from_citation)
-    out["source_pdf"] = out["source_pdf"].fillna("")
-    return out
+        df["source_pdf"] = src.fillna("")
+        return df
+    mask_blank = src.isna() | (src.astype(str).str.strip() == "")
+    guessed = guess_pdfs(df.loc[mask_blank, "citation_text"])
+    df["source_pdf"] = src.where(~mask_blank, guessed).fillna("")
+    return df
 
 # ---------- Minimal derivations for required columns ----------
 
@@ -103,15 +162,21 @@ def ensure_required_columns(df: pd.DataFrame) -> pd.DataFrame:
     # derive is_quote / has_numbers if missing or blanky
     if "claim_text" in out.columns:
         ct = out["claim_text"].fillna("")
-        if "is_quote" in out.columns and out["is_quote"].dtype != bool:
-            out["is_quote"] = out["is_quote"].astype(str).str.lower().isin(["true", "1", "yes"])
-        if "has_numbers" in out.columns and out["has_numbers"].dtype != bool:
-            out["has_numbers"] = out["has_numbers"].astype(str).str.lower().isin(["true", "1", "yes"])
-        # If still default False, try heuristic
-        out.loc[out["is_quote"] == False, "is_quote"] = ct.str.contains(r"[“”\"']", regex=True)
-        out.loc[out["has_numbers"] == False, "has_numbers"] = ct.str.contains(r"\d", regex=True)
+        for col in ("is_quote", "has_numbers"):
+            if col in out.columns and out[col].dtype != bool:
+                out[col] = _truthy(out[col])
+        # If still default False, try heuristic: a False flag takes the heuristic's value,
+        # which is just an OR, with one regex scan per flag and no masked .loc alignment
+        out["is_quote"] = out["is_quote"] | ct.str.contains(_QUOTE_RE, regex=True)
+        out["has_numbers"] = out["has_numbers"] | ct.str.contains(_DIGIT_RE, regex=True)
     return out
 
+def _truthy(s: pd.Series) -> pd.Series:
+    # str().lower() in {"true","1","yes"}, evaluated once per distinct value rather than per row
+    codes, uniques = pd.factorize(s)
+    hits = pd.Index(uniques).astype(str).str.lower().isin(["true", "1", "yes"])
+    return pd.Series(np.append(hits, False)[codes], index=s.index)
+
 # ---------- Read inputs intelligently ----------
 
 def read_best_available() -> pd.DataFrame:
@@ -143,13 +208,14 @@ def main() -> int:
     # Write canonical CSV
     safe_write_csv(df, str(CANONICAL_CSV))
 
-    # Backward-compat shim (one line keeps downstream working unchanged)
-    safe_write_csv(df, str(LEGACY_ENRICHED))
+    # Backward-compat shim (one line keeps downstream working unchanged);
+    # same bytes as the canonical CSV, so copy the file instead of re-serializing
+    shutil.copyfile(CANONICAL_CSV, LEGACY_ENRICHED)
 
     # Timestamped history copy
     stamp = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
     history_path = HISTORY_DIR / f"ccp_registry_enriched_FIXED_{stamp}.csv"
-    safe_write_csv(df, str(history_path))
+    shutil.copyfile(CANONICAL_CSV, history_path)
 
     # Optional: Parquet if pyarrow is installed
     try:
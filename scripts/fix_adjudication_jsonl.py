@@ -1,13 +1,24 @@
 ﻿import json, sys, os
 from typing import Iterable, Dict, Any
+import orjson
 
 CANDIDATE_ARRAY_KEYS = [
     "records","items","data","rows","results","entries",
     "docs","objects","payload"
 ]
 
+def _loads(s: str) -> Any:
+    try:
+        return orjson.loads(s)
+    except orjson.JSONDecodeError:
+        # NaN/Infinity literals are accepted by json but not orjson
+        return json.loads(s)
+
 def _compact(obj: Dict[str, Any]) -> str:
-    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    try:
+        return orjson.dumps(obj).decode("utf-8")
+    except TypeError:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
 
 def _detect_rows(obj: Any):
     if isinstance(obj, list):
@@ -25,26 +36,18 @@ def _detect_rows(obj: Any):
             return list(obj.values())
     raise ValueError("Could not detect a list of JSON objects inside the top-level data structure.")
 
-def _brace_split(text: str):
-    objs, depth, start, in_str, esc = [], 0, None, False, False
-    for i, ch in enumerate(text):
-        if in_str:
-            if esc: esc = False
-            elif ch == "\\": esc = True
-            elif ch == '"': in_str = False
-            continue
-        else:
-            if ch == '"':
-                in_str = True
-                continue
-            if ch == "{":
-                if depth == 0: start = i
-                depth += 1
-            elif ch == "}":
-                depth -= 1
-                if depth == 0 and start is not None:
-                    objs.append(text[start:i+1]); start = None
-    return objs
+def _split_objects(text: str):
+    # Concatenated / comma- or newline-separated objects: jump to each top-level "{"
+    # and let the C decoder consume the whole object
+    dec, pos, idx = json.JSONDecoder(), text.find("{"), 0
+    while pos != -1:
+        idx += 1
+        try:
+            d, pos = dec.raw_decode(text, pos)
+        except Exception as e:
+            raise ValueError(f"Fallback parse failed on object #{idx}: {e}") from e
+        yield d
+        pos = text.find("{", pos)
 
 def main(path: str, out_path: str):
     with open(path, "r", encoding="utf-8") as f:
@@ -52,49 +55,30 @@ def main(path: str, out_path: str):
 
     rows = None
     try:
-        loaded = json.loads(raw)
+        loaded = _loads(raw)
         rows = _detect_rows(loaded)
     except Exception:
         pass
 
     if rows is None:
-        objs = _brace_split(raw)
-        if objs:
-            parsed = []
-            for idx, o in enumerate(objs, 1):
-                try:
-                    d = json.loads(o)
-                except Exception as e:
-                    raise ValueError(f"Fallback parse failed on object #{idx}: {e}") from e
-                if not isinstance(d, dict):
-                    raise ValueError(f"Fallback parse found non-object at #{idx}.")
-                parsed.append(d)
-            rows = parsed
+        rows = list(_split_objects(raw)) or None
 
     if rows is None:
         raise SystemExit("ERROR: Could not recover records from input. Aborting.")
 
+    # Validate in memory rather than re-reading the output: every record is a parsed dict,
+    # and compact dumps escape newlines, so each one serializes to exactly one JSON line
+    for i, rec in enumerate(rows, 1):
+        if not isinstance(rec, dict):
+            raise SystemExit(f"Validation failed on line {i}: line is not a JSON object")
+    payload = "".join(_compact(rec) + "\n" for rec in rows)
+
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
     with open(out_path, "w", encoding="utf-8", newline="\n") as w:
-        for rec in rows:
-            w.write(_compact(rec) + "\n")
+        w.write(payload)
 
     print(f"OK: Wrote {len(rows)} JSON objects to {out_path}")
-
-    valid = 0
-    with open(out_path, "r", encoding="utf-8") as f:
-        for i, line in enumerate(f, 1):
-            s = line.strip()
-            if not s: continue
-            try:
-                obj = json.loads(s)
-                if isinstance(obj, dict):
-                    valid += 1
-                else:
-                    raise ValueError("line is not a JSON object")
-            except Exception as e:
-                raise SystemExit(f"Validation failed on line {i}: {e}")
-    print(f"Validation: {valid} valid lines, 0 invalid.")
+    print(f"Validation: {len(rows)} valid lines, 0 invalid.")
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
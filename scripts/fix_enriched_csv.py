@@ -1,5 +1,7 @@
 # scripts/fix_enriched_csv.py
-import re, unicodedata, os, sys, glob
+import re, unicodedata, os, sys
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
@@ -10,6 +12,16 @@ PDF_DIR = Path("pilot_inputs/sources_pdf")
 
 # --- helpers ---------------------------------------------------------------
 
+_DASH_RE = re.compile(r"[–—‐]")
+_WS_RE = re.compile(r"\s+")
+_POSSESSIVE_RE = re.compile(r"[’']s\b")
+_AND_RE = re.compile(r"\s+(?:&|and)\s+")
+_ETAL_RE = re.compile(r"\bet\s+al\.?\b", re.I)
+_SURNAME_RE = re.compile(r"([A-Za-z\-]+)")
+_YEAR_RE = re.compile(r"((?:19|20)\d{2})")
+
+# The same surnames come back across PDF names and citation columns; normalize each once
+@lru_cache(maxsize=None)
 def ascii_norm(s: str) -> str:
     s = unicodedata.normalize("NFKD", s or "").strip()
     s = "".join(ch for ch in s if not unicodedata.combining(ch))
@@ -20,35 +32,52 @@ def clean_author_token(raw: str) -> str:
     if not raw: return ""
     s = ascii_norm(raw)
     # Canonicalize dash variants & whitespace
-    s = s.replace("–", "-").replace("—", "-").replace("‐", "-")
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _DASH_RE.sub("-", s)
+    s = _WS_RE.sub(" ", s).strip()
 
     # Common producer typos / variants
     s = s.replace("CLEARAA", "CLEAR-AA")
 
     # Drop possessives and trailing garbage like “’s”
-    s = re.sub(r"[’']s\b", "", s)
+    s = _POSSESSIVE_RE.sub("", s)
 
     # Remove leading phrases that leaked from prose (“Theory and Kirkhart’s”, etc.)
     # Keep only the first authorish token cluster (allowing hyphens)
     # If we have “A & B” or “A and B”, keep A (first author)
-    s = re.split(r"\s+(?:&|and)\s+", s)[0]
+    s = _AND_RE.split(s, maxsplit=1)[0]
 
     # Kill “et al.” if it’s there
-    s = re.sub(r"\bet\s+al\.?\b", "", s, flags=re.I).strip()
+    s = _ETAL_RE.sub("", s).strip()
 
     # If it still has commas, keep leftmost (often “Surname, Initials”)
     s = s.split(",")[0].strip()
 
     # Keep a single surname-ish token (letters/hyphen only)
-    m = re.search(r"[A-Za-z\-]+", s)
+    m = _SURNAME_RE.search(s)
     return m.group(0).lower() if m else ""
 
+def author_keys(authors: pd.Series) -> pd.Series:
+    """clean_author_token for a whole column: the same steps as .str ops, run once per distinct author."""
+    codes, uniq = pd.factorize(authors.fillna(""))
+    s = pd.Series(uniq, dtype=str).map(ascii_norm)  # NFKD + combining marks: no .str equivalent
+    s = s.str.replace(_DASH_RE, "-", regex=True)
+    s = s.str.replace(_WS_RE, " ", regex=True).str.strip()
+    s = s.str.replace("CLEARAA", "CLEAR-AA", regex=False)
+    s = s.str.replace(_POSSESSIVE_RE, "", regex=True)
+    s = s.str.split(_AND_RE, n=1, regex=True).str[0]
+    s = s.str.replace(_ETAL_RE, "", regex=True).str.strip()
+    s = s.str.split(",", n=1).str[0].str.strip()
+    keys = s.str.extract(_SURNAME_RE, expand=False).str.lower().fillna("")
+    return pd.Series(keys.to_numpy()[codes], index=authors.index)
+
 def clean_year(y) -> str:
     if pd.isna(y): return ""
-    m = re.search(r"(19|20)\d{2}", str(y))
+    m = _YEAR_RE.search(str(y))
     return m.group(0) if m else ""
 
+def year_keys(years: pd.Series) -> pd.Series:
+    return years.astype(str).str.extract(_YEAR_RE, expand=False).where(years.notna()).fillna("")
+
 def rel_pdf(pathlike: str) -> str:
     """Normalize to forward-slash relative path inside pilot_inputs/sources_pdf."""
     if not pathlike: return ""
@@ -62,12 +91,18 @@ def build_pdf_index(pdf_dir: Path):
     author_key = first surname (lowercased) from filename prefix before '_' if possible.
     """
     idx = {}
-    for p in glob.glob(str(pdf_dir / "*.pdf")):
-        name = os.path.basename(p)
+    # One scandir pass over the names; same entries, in the same order, as glob("*.pdf")
+    try:
+        with os.scandir(pdf_dir) as it:
+            names = [e.name for e in it if not e.name.startswith(".") and os.path.normcase(e.name).endswith(".pdf")]
+    except OSError:
+        return idx
+    for name in names:
         stem = os.path.splitext(name)[0]  # e.g., Chirau_2022
-        s = ascii_norm(stem)
+        # NFKD cannot change a pure-ASCII stem; only the strip is left to do
+        s = stem.strip() if stem.isascii() else ascii_norm(stem)
         # Extract year from suffix
-        ym = re.search(r"(19|20)\d{2}", s)
+        ym = _YEAR_RE.search(s)
         year = ym.group(0) if ym else ""
         # Extract author key as leftmost token before year or underscore
         left = s.split("_")[0]
@@ -114,51 +149,35 @@ pdf_idx = build_pdf_index(PDF_DIR)
 present_files = {n for lst in pdf_idx.values() for n in lst}
 
 # Add diagnostics columns
-df["author_key"] = df["citation_author"].map(clean_author_token)
-df["year_key"]   = df["citation_year"].map(clean_year)
+df["author_key"] = author_keys(df["citation_author"])
+df["year_key"]   = year_keys(df["citation_year"])
 df["mapping_note"] = ""
 
 # Normalize existing paths to relative, forward-slash
 df["source_pdf_path"] = df["source_pdf_path"].map(rel_pdf)
 
-# Try strict author+year match, with overrides first
-fixed_paths = []
-notes = []
-
-for i, row in df.iterrows():
-    akey = row["author_key"]
-    ykey = row["year_key"]
-
-    # Skip if no citation info
-    if not akey or not ykey:
-        fixed_paths.append(row["source_pdf_path"])
-        notes.append(row["mapping_note"])
-        continue
-
-    # 1) Try override table
-    over = apply_overrides(akey, ykey)
-    if over and over in present_files:
-        fixed_paths.append(f"pilot_inputs/sources_pdf/{over}")
-        notes.append("override")
-        continue
-
-    # 2) Strict index match
-    chosen = choose_pdf(akey, ykey, pdf_idx)
-    if chosen:
-        fixed_paths.append(f"pilot_inputs/sources_pdf/{chosen}")
-        # If original pointed to a different year, flag it
-        orig = os.path.basename(row["source_pdf_path"])
-        if orig and orig != chosen:
-            notes.append(f"corrected_from:{orig}")
-        else:
-            notes.append("")
-    else:
-        # No exact file—leave blank and flag for manual
-        fixed_paths.append("")
-        notes.append("no_exact_author_year_pdf")
-
-df["source_pdf_path"] = fixed_paths
-df["mapping_note"] = notes
+# Try strict author+year match, with overrides first; resolved column-wise through
+# "author|year" lookups instead of a per-row loop
+key = df["author_key"] + "|" + df["year_key"]
+has_key = df["author_key"].ne("") & df["year_key"].ne("")
+# 1) override table (only files that are actually present)
+over = key.map({k: v for k, v in OVERRIDES.items() if v in present_files})
+# 2) strict index match, same deterministic pick as choose_pdf
+chosen = key.map({f"{a}|{y}": choose_pdf(a, y, pdf_idx) for a, y in pdf_idx if a and y})
+# If original pointed to a different file, flag it
+orig = df["source_pdf_path"].str.removeprefix("pilot_inputs/sources_pdf/")
+corrected = np.where(orig.ne("") & orig.ne(chosen), "corrected_from:" + orig, "")
+
+df["source_pdf_path"] = np.select(
+    [~has_key, over.notna(), chosen.notna()],
+    [df["source_pdf_path"], "pilot_inputs/sources_pdf/" + over, "pilot_inputs/sources_pdf/" + chosen],
+    "",  # no exact file: leave blank and flag for manual
+)
+df["mapping_note"] = np.select(
+    [~has_key, over.notna(), chosen.notna()],
+    [df["mapping_note"], "override", corrected],
+    "no_exact_author_year_pdf",
+)
 
 # Clean CLEARAA typos in citation_author
 df.loc[df["citation_author"].str.contains(r"\bCLEARAA\b", case=False, regex=True), "citation_author"] = "CLEAR-AA"
@@ -0,0 +1,69 @@
+﻿"""Helpers shared by the jsonl_tools repair scripts (each is run by path from the repo root)."""
+import json, mmap, re
+from contextlib import nullcontext
+import orjson
+
+# Balanced top-level {...} spans. Strings (escapes included, unterminated ones run to EOF) are
+# matched whole by the regex engine, so braces inside them don't count; only the braces need
+# Python-level bookkeeping, and the scan is linear, unlike a lazy .*? match with a lookahead
+_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"?|[{}]', re.S)
+_TOKEN_RE_B = re.compile(rb'"(?:[^"\\]|\\.)*"?|[{}]', re.S)
+
+# Bare NaN / Infinity / -Infinity tokens outside string literals (strings are matched whole
+# and kept), rewritten to null in one C-level pass instead of walking the parsed objects
+_NONFINITE_RE = re.compile(rb'("(?:[^"\\]|\\.)*"?)|-?Infinity|NaN', re.S)
+
+def loads(s):
+    """orjson first; json for what it rejects (NaN/Infinity literals). Undecodable bytes become U+FFFD."""
+    try:
+        return orjson.loads(s)
+    except orjson.JSONDecodeError:
+        return json.loads(s.decode("utf-8", "replace") if isinstance(s, bytes) else s)
+
+def loads_finite(s: bytes):
+    """loads() for bytes, with bare NaN/Infinity/-Infinity read as null."""
+    try:
+        return orjson.loads(s)
+    except orjson.JSONDecodeError:
+        s = _NONFINITE_RE.sub(lambda m: m.group(1) or b"null", s)
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # undecodable bytes become U+FFFD, as with errors="replace"; an overflowing
+            # number still parses as inf here, and orjson writes that as null
+            return json.loads(s.decode("utf-8", "replace"))
+
+def dumps(o, allow_nan: bool = True) -> bytes:
+    """One compact JSON line; json only for what orjson can't serialize (e.g. ints over 64 bits)."""
+    try:
+        return orjson.dumps(o)
+    except TypeError:
+        return json.dumps(o, ensure_ascii=False, allow_nan=allow_nan).encode("utf-8")
+
+def mapped(path):
+    """
+    The file as a read-only mmap (b"" when empty), for scanning as bytes straight from the page
+    cache: the delimiters are all ASCII, so nothing is decoded up front and each extracted
+    object goes to orjson as a bytes slice.
+    """
+    if path.stat().st_size == 0:
+        return nullcontext(b"")  # mmap refuses empty files
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def split_objects(text) -> list:
+    """Top-level {...} chunks of a str, bytes or mmap, in order; unbalanced tails are dropped."""
+    binary = not isinstance(text, str)
+    open_, close = (b"{", b"}") if binary else ("{", "}")
+    chunks, depth, start = [], 0, None
+    for m in (_TOKEN_RE_B if binary else _TOKEN_RE).finditer(text):
+        ch = m.group(0)
+        if ch == open_:
+            if depth == 0:
+                start = m.start()
+            depth += 1
+        elif ch == close and depth > 0:
+            depth -= 1
+            if depth == 0:
+                chunks.append(text[start:m.end()])
+    return chunks
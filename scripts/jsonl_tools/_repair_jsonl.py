@@ -1,4 +1,8 @@
-﻿import json, re, pathlib, sys
+﻿import re, pathlib, sys
+
+# Shared helpers live next to this script; the import works however it is launched
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+from _common import loads, dumps, split_objects
 
 p = pathlib.Path("outputs/adjudication_inputs.jsonl")
 if not p.exists():
@@ -7,6 +11,9 @@ if not p.exists():
 
 raw = p.read_text(encoding="utf-8").strip()
 
+def write_jsonl(records):
+    p.write_bytes(b"\n".join(dumps(r) for r in records))
+
 records = []
 def try_add(obj):
     if isinstance(obj, dict):
@@ -25,14 +32,13 @@ if len(lines) > 1:
         if not s: 
             continue
         try:
-            records.append(json.loads(s))
+            records.append(loads(s))
             ok += 1
         except Exception:
             pass
     if ok == len([ln for ln in lines if ln.strip()]):
         # already good, just rewrite normalized
-        out = "\n".join(json.dumps(r, ensure_ascii=False) for r in records)
-        p.write_text(out, encoding="utf-8")
+        write_jsonl(records)
         print(f"Normalized JSONL: {len(records)} records.")
         sys.exit(0)
     else:
@@ -42,34 +48,32 @@ if len(lines) > 1:
 # Case B: full JSON array
 if raw.startswith("["):
     try:
-        try_add(json.loads(raw))
+        try_add(loads(raw))
         if records:
-            out = "\n".join(json.dumps(r, ensure_ascii=False) for r in records)
-            p.write_text(out, encoding="utf-8")
+            write_jsonl(records)
             print(f"Converted JSON array -> JSONL: {len(records)} records.")
             sys.exit(0)
     except Exception:
         pass
 
 # Case C: concatenated objects like "{}{}{}" on one line (or with whitespace)
-chunks = re.findall(r"\{.*?\}(?=\s*\{|\s*$)", raw, flags=re.S)
+chunks = split_objects(raw)
 if chunks:
     ok=0
     for ch in chunks:
         try:
-            records.append(json.loads(ch))
+            records.append(loads(ch))
             ok+=1
         except Exception:
             # try to strip trailing commas inside objects
             ch2 = re.sub(r",\s*([}\]])", r"\1", ch)
             try:
-                records.append(json.loads(ch2))
+                records.append(loads(ch2))
                 ok+=1
             except Exception:
                 pass
     if ok:
-        out = "\n".join(json.dumps(r, ensure_ascii=False) for r in records)
-        p.write_text(out, encoding="utf-8")
+        write_jsonl(records)
         print(f"Split concatenated objects -> JSONL: {len(records)} records.")
         sys.exit(0)
 
@@ -78,10 +82,9 @@ clean = raw.encode("utf-8-sig").decode("utf-8-sig")
 clean = re.sub(r",\s*([}\]])", r"\1", clean)
 if clean.startswith("["):
     try:
-        try_add(json.loads(clean))
+        try_add(loads(clean))
         if records:
-            out = "\n".join(json.dumps(r, ensure_ascii=False) for r in records)
-            p.write_text(out, encoding="utf-8")
+            write_jsonl(records)
             print(f"Recovered JSON array with cleanup -> JSONL: {len(records)} records.")
             sys.exit(0)
     except Exception:
@@ -1,10 +1,14 @@
-﻿import re, json, pathlib
+﻿import pathlib, sys
+
+# Shared helpers live next to this script; the import works however it is launched
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+from _common import loads, dumps, split_objects
 
 p = pathlib.Path("outputs/adjudication_inputs.jsonl")
 raw = p.read_text(encoding="utf-8")
 
 # Split into { ... } blocks
-chunks = re.findall(r"\{.*?\}(?=\s*\{|\s*$)", raw, flags=re.S)
+chunks = split_objects(raw)
 print(f"Found {len(chunks)} JSON-like chunks")
 
 objs = []
@@ -12,11 +16,10 @@ for i, ch in enumerate(chunks, 1):
     try:
         # replace NaN/Infinity which are not valid JSON
         fixed = ch.replace("NaN", "null").replace("Infinity","null")
-        objs.append(json.loads(fixed))
+        objs.append(loads(fixed))
     except Exception as e:
         print(f"Chunk {i} failed: {e}")
 
 # Write back as JSONL
-out = "\n".join(json.dumps(o, ensure_ascii=False) for o in objs)
-p.write_text(out, encoding="utf-8")
+p.write_bytes(b"\n".join(dumps(o) for o in objs))
 print(f"Normalized JSONL: wrote {len(objs)} records to {p}")
@@ -1,17 +1,20 @@
-﻿import json, pathlib, re, math
+﻿import pathlib, sys
+
+# Shared helpers live next to this script; the import works however it is launched
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+from _common import loads, dumps, split_objects
 
 p = pathlib.Path("outputs/adjudication_inputs.jsonl")
 raw = p.read_text(encoding="utf-8")
 
 def try_parse_full_document(text):
     try:
-        return json.loads(text)
+        return loads(text)
     except Exception:
         return None
 
 def emit_lines(objs):
-    out = "\n".join(json.dumps(o, ensure_ascii=False) for o in objs)
-    p.write_text(out, encoding="utf-8")
+    p.write_bytes(b"\n".join(dumps(o) for o in objs))
     return len(objs)
 
 # 2a) Try parsing the whole file as a single JSON value
@@ -30,27 +33,27 @@ elif isinstance(doc, dict):
             break
     else:
         # Not a list-bearing dict. Fall back to regex chunking.
-        chunks = re.findall(r"\{.*?\}(?=\s*\{|\s*$)", raw, flags=re.S)
+        chunks = split_objects(raw)
         if chunks:
             objs = []
             for ch in chunks:
                 try:
-                    objs.append(json.loads(ch))
+                    objs.append(loads(ch))
                 except Exception:
                     pass
             n = emit_lines(objs)
             print(f"Normalized via regex: wrote {n} JSONL lines from concatenated objects.")
         else:
             # Just write back a single object per line if it's an object
-            p.write_text(json.dumps(doc, ensure_ascii=False)+"\n", encoding="utf-8")
+            p.write_bytes(dumps(doc) + b"\n")
             print("Normalized: single JSON object written as one-line JSONL.")
 else:
     # Not parseable as one document: split on brace chunks
-    chunks = re.findall(r"\{.*?\}(?=\s*\{|\s*$)", raw, flags=re.S)
+    chunks = split_objects(raw)
     objs = []
     for ch in chunks:
         try:
-            objs.append(json.loads(ch))
+            objs.append(loads(ch))
         except Exception:
             pass
     if objs:
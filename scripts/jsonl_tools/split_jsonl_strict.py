@@ -1,18 +1,22 @@
-﻿import json, re, pathlib
+﻿import pathlib, sys
+
+# Shared helpers live next to this script; the import works however it is launched
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+from _common import loads, dumps, split_objects
 
 p = pathlib.Path("outputs/adjudication_inputs.jsonl")
 raw = p.read_text(encoding="utf-8")
 
 # Split on objects (even if concatenated)
-chunks = re.findall(r"\{.*?\}(?=\s*\{|\s*$)", raw, flags=re.S)
+chunks = split_objects(raw)
 
 objs = []
 for i, ch in enumerate(chunks, 1):
     try:
-        objs.append(json.loads(ch))
+        objs.append(loads(ch))
     except Exception as e:
         print(f"Line {i} failed: {e}")
 
 outpath = pathlib.Path("outputs/adjudication_inputs.jsonl")
-outpath.write_text("\n".join(json.dumps(o, ensure_ascii=False) for o in objs), encoding="utf-8")
+outpath.write_bytes(b"\n".join(dumps(o) for o in objs))
 print(f"Strict split: wrote {len(objs)} records to {outpath}")
@@ -1,21 +1,21 @@
 import json, pathlib, sys, importlib
 sys.path.insert(0, str(pathlib.Path("src").resolve()))
-from audit_lib.llm import _load_file, openai_call
-from jinja2 import Template
+from audit_lib.config import get_config
+from audit_lib.llm import _load_file, load_template, openai_call
 
 M = importlib.import_module("scripts.50_adjudicate")
 
 SYSTEM_PATH = getattr(M, "SYSTEM_PATH", pathlib.Path("prompts/adjudicator_system.txt"))
 USER_TMPL   = getattr(M, "USER_TMPL",   pathlib.Path("prompts/adjudicator_user.jinja"))
 SCHEMA_PATH = getattr(M, "SCHEMA_PATH", pathlib.Path("prompts/adjudicator_json_schema.json"))
-MODEL       = getattr(M, "MODEL")
+MODEL       = get_config()["llm"]["model"]
 
 with open("outputs/adjudication_inputs.jsonl","r",encoding="utf-8") as f:
     line = next(l for l in f if l.strip())
 obj = json.loads(line)
 
 system_prompt = _load_file(SYSTEM_PATH)
-tmpl = Template(_load_file(str(USER_TMPL)))
+tmpl = load_template(USER_TMPL)
 user_prompt = tmpl.render(
     claim_text=obj["claim_text"],
     review_context="",
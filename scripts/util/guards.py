@@ -18,4 +18,5 @@ def coerce_dtypes(df: pd.DataFrame, dtypes: Dict[str, Any]) -> pd.DataFrame:
     return out
 
 def safe_write_csv(df: pd.DataFrame, path: str) -> None:
-    df.to_csv(path, index=False, encoding="utf-8")
\ No newline at end of file
+    # "\n" everywhere: no CRLF translation (and doubled line endings) on Windows
+    df.to_csv(path, index=False, encoding="utf-8", lineterminator="\n")
\ No newline at end of file
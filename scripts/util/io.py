@@ -1,4 +1,6 @@
+import hashlib, os
 from pathlib import Path
+from typing import Iterable, Optional
 import pandas as pd
 from .paths import CANONICAL_CSV
 
@@ -9,4 +11,43 @@ def read_enriched_fixed() -> pd.DataFrame:
         return pd.read_csv(CANONICAL_CSV, encoding="utf-8")
     raise FileNotFoundError(
         "Missing canonical artifact. Run: python scripts/99_build_enriched_fixed.py"
-    )
\ No newline at end of file
+    )
+
+ADJ_CATEGORICAL = ("verdict", "priority", "review_id", "section")
+# Bump whenever what load_adjudications caches changes (dtypes, columns), so older caches are ignored
+ADJ_CACHE_VERSION = 2
+
+def load_adjudications(path: Path, usecols: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Read an adjudications CSV, memoized on disk: the parsed frame is pickled next to it
+    (<name>.<columns hash>.pkl, one per column selection) together with the cache version,
+    the selected columns and the CSV's size and mtime, and reused while all of those still
+    match, so re-running 60/70/80 against the same adjudications parses the CSV only once.
+    usecols selects columns (missing ones are skipped); only those are parsed on a miss.
+    The cache is only ever written by this function, into the pipeline's own outputs dir.
+    """
+    path = Path(path)
+    wanted = None if usecols is None else frozenset(usecols)
+    cols_key = "*" if wanted is None else "\x1f".join(sorted(wanted))
+    tag = hashlib.blake2b(cols_key.encode("utf-8"), digest_size=4).hexdigest()
+    cache = path.with_name(f"{path.stem}.{tag}.pkl")
+    st = path.stat()
+    key = (ADJ_CACHE_VERSION, st.st_size, st.st_mtime_ns, cols_key)
+    try:
+        cached_key, cached_df = pd.read_pickle(cache)
+        if cached_key == key:
+            return cached_df
+    except Exception:
+        pass  # no cache yet, or an unreadable one: fall back to the CSV
+    df = pd.read_csv(path, usecols=None if wanted is None else (lambda c: c in wanted))
+    # Few distinct values, repeated on every row: int codes make isin/groupby/value_counts cheap
+    for c in ADJ_CATEGORICAL:
+        if c in df.columns and pd.api.types.is_string_dtype(df[c]):
+            df[c] = df[c].astype("category")
+    tmp = cache.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        pd.to_pickle((key, df), tmp)
+        os.replace(tmp, cache)
+    except OSError:
+        pass  # read-only outputs dir: just skip the cache
+    return df
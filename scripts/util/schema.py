@@ -9,4 +9,7 @@ REQUIRED_ENRICHED_COLUMNS = [
     "is_causal_or_normative",
     "citation_text",
     "source_pdf",
-]
\ No newline at end of file
+]
+
+# Verdicts that count against a claim (sampling escalation, corrections list).
+BAD_VERDICTS = ["UNSUPPORTED_FAIL", "AMBIGUOUS_REVIEW"]
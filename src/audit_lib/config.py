@@ -0,0 +1,32 @@
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Mapping
+import yaml
+
+CONFIG_PATH = Path("config/config.yaml")
+# safe_load always uses the pure-Python SafeLoader; take the libyaml one when PyYAML has it
+_SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+def load_config(path: Path = CONFIG_PATH) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.load(f, Loader=_SafeLoader)
+
+def _freeze(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+@lru_cache(maxsize=None)
+def _cached_config(path: Path) -> Mapping[str, Any]:
+    return _freeze(load_config(path))
+
+def get_config(path: Path = CONFIG_PATH) -> Mapping[str, Any]:
+    """
+    Parsed once per process and shared by every stage that imports it; read-only
+    (all the way down) so no caller can change it for the others. Use load_config()
+    for a private, mutable copy.
+    """
+    return _cached_config(Path(path).resolve())
@@ -0,0 +1,37 @@
+import zipfile
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_TEXT_TAGS = {f"{_W}t": None, f"{_W}tab": "\t", f"{_W}ptab": "\t", f"{_W}cr": "\n", f"{_W}noBreakHyphen": "-"}
+
+def _run_text(run) -> str:
+    parts = []
+    for el in run:
+        if el.tag in _TEXT_TAGS:
+            parts.append(_TEXT_TAGS[el.tag] or el.text or "")
+        elif el.tag == f"{_W}br" and el.get(f"{_W}type", "textWrapping") == "textWrapping":
+            parts.append("\n")
+    return "".join(parts)
+
+def _paragraph_runs(p):
+    # The paragraph's own runs and the runs directly inside its hyperlinks, in order, as
+    # python-docx reads them: tracked insertions, content controls and textboxes are not text
+    for el in p:
+        if el.tag == f"{_W}r":
+            yield el
+        elif el.tag == f"{_W}hyperlink":
+            yield from el.iterfind(f"{_W}r")
+
+def docx_to_text(docx_path: Path) -> str:
+    """
+    Body paragraph text of a .docx, one paragraph per line -- the same text as
+    "\\n".join(p.text for p in Document(path).paragraphs), read straight from
+    word/document.xml without building python-docx objects.
+    """
+    with zipfile.ZipFile(docx_path) as z:
+        root = ET.fromstring(z.read("word/document.xml"))
+    body = root.find(f"{_W}body")
+    if body is None:
+        return ""
+    return "\n".join("".join(map(_run_text, _paragraph_runs(p))) for p in body.iterfind(f"{_W}p"))
@@ -17,11 +17,14 @@ No external deps besides python-docx.
 
 from __future__ import annotations
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
+from itertools import chain
+from typing import Iterable, Iterator, List, Dict, Tuple, Optional
 import csv
 import math
+import os
 import re
 import string
+import tempfile
 
 # ---------------------------
 # Basic text utils
@@ -101,9 +104,11 @@ def _load_docx_sections(docx_path: Path) -> Tuple[str, List[Dict]]:
         return "", []
 
     doc = Document(str(docx_path))
+    # Document.paragraphs rebuilds the whole Paragraph list on every access; take it once
+    paragraphs = doc.paragraphs
 
     heads = []  # (idx, level, title)
-    for i, p in enumerate(doc.paragraphs):
+    for i, p in enumerate(paragraphs):
         style_name = (getattr(p.style, "name", "") or "").lower()
         if style_name.startswith("heading"):
             m = re.search(r"(\d+)", style_name)
@@ -126,13 +131,8 @@ def _load_docx_sections(docx_path: Path) -> Tuple[str, List[Dict]]:
 
     sections: List[Dict] = []
     for j, (idx, lvl, title) in enumerate(heads):
-        nxt = heads[j + 1][0] if j + 1 < len(heads) else len(doc.paragraphs)
-        chunks = []
-        for k in range(idx + 1, nxt):
-            t = _norm_spaces(doc.paragraphs[k].text)
-            if t:
-                chunks.append(t)
-        body = " ".join(chunks)
+        nxt = heads[j + 1][0] if j + 1 < len(heads) else len(paragraphs)
+        body = " ".join(t for t in (_norm_spaces(p.text) for p in paragraphs[idx + 1:nxt]) if t)
         sections.append({"level": lvl, "title": title, "body": body})
 
     return rq, sections
@@ -475,30 +475,45 @@ def _read_csv(path: Path) -> List[dict]:
     with open(path, "r", encoding="utf-8-sig", newline="") as f:
         return list(csv.DictReader(f))
 
-def _write_csv(path: Path, rows: List[dict], fieldnames: List[str]) -> None:
+def _write_csv(path: Path, rows: Iterable[dict], fieldnames: List[str]) -> None:
+    # rows may be a lazy enrichment iterator: stream them into a sibling temp file and swap it
+    # in only once every row is written, so a failure mid-way leaves the old CSV intact
     path.parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", newline="", dir=path.parent,
+                                     prefix=path.name + ".", suffix=".tmp", delete=False) as f:
+        try:
+            w = csv.DictWriter(f, fieldnames=fieldnames)
+            w.writeheader()
+            w.writerows(rows)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    try:
+        os.replace(f.name, path)
+    except BaseException:
+        os.unlink(f.name)
+        raise
 
 # ---------------------------
 # Public API
 # ---------------------------
 
-def enrich_registry_rows(raw_rows: List[dict], reviews_dir: Path, pdf_dir: Optional[Path] = None) -> List[dict]:
+def enrich_registry_rows(raw_rows: Iterable[dict], reviews_dir: Path, pdf_dir: Optional[Path] = None) -> List[dict]:
+    return list(iter_enriched_rows(raw_rows, reviews_dir, pdf_dir))
+
+def iter_enriched_rows(raw_rows: Iterable[dict], reviews_dir: Path, pdf_dir: Optional[Path] = None) -> Iterator[dict]:
     """
     For each review_id in raw_rows:
       - open pilot_inputs/reviews/<review_id>.docx, parse H1..H4 and build bodies
       - match each claim_text to the best section via TF-IDF cosine
       - If source_pdf_path is blank or missing, resolve it against `pdf_dir`
     Append: section_canonical, section_level, research_question, section_title
+    Rows are yielded one at a time, so a reader can be piped straight into write_enriched_csv.
     """
     doc_cache: Dict[str, Tuple[str, List[Dict]]] = {}
     pdf_index: List[Dict] = _build_pdf_index(pdf_dir) if pdf_dir else []
 
-    enriched: List[dict] = []
     for r in raw_rows:
         rid = r.get("review_id", "")
         claim_text = r.get("claim_text", "") or ""
@@ -538,19 +553,21 @@ def enrich_registry_rows(raw_rows: List[dict], reviews_dir: Path, pdf_dir: Optio
             # normalize already-populated paths too
             if existing:
                 out["source_pdf_path"] = existing.replace("\\", "/")
-        enriched.append(out)
-    return enriched
+        yield out
 
-def write_enriched_csv(enriched_rows: List[dict], out_path: Path) -> None:
+def write_enriched_csv(enriched_rows: Iterable[dict], out_path: Path) -> None:
     """
     Write CSV preserving original columns + 4 new enrichment columns at the end.
+    Accepts a list or a lazy iterator of rows; the header comes from the first row.
     """
-    if not enriched_rows:
+    rows = iter(enriched_rows)
+    first = next(rows, None)
+    if first is None:
         _write_csv(out_path, [], [])
         return
-    base_cols = list(enriched_rows[0].keys())
+    base_cols = list(first.keys())
     for c in ["section_canonical", "section_level", "research_question", "section_title"]:
         if c in base_cols:
             base_cols.remove(c)
     fieldnames = base_cols + ["section_canonical", "section_level", "research_question", "section_title"]
-    _write_csv(out_path, enriched_rows, fieldnames)
\ No newline at end of file
+    _write_csv(out_path, chain([first], rows), fieldnames)
\ No newline at end of file
@@ -1,11 +1,33 @@
-import os, json
-from typing import Dict, Any, List
-from jinja2 import Template
+import os, re, json, hashlib, threading, time
+import orjson
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from jinja2 import Environment, FileSystemLoader, Template
+_FENCE_OPEN_RE = re.compile(r"^```(?:json)?\s*")
+_FENCE_CLOSE_RE = re.compile(r"\s*```$")
+_JSON_BLOCK_RE = re.compile(r"\{.*\}", re.DOTALL)
+def parse_json_response(text: str) -> Dict[str,Any]:
+    # Well-formed JSON is the common case; only strip fences / dig out the object when that fails
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        pass
+    t = _FENCE_CLOSE_RE.sub("", _FENCE_OPEN_RE.sub("", text.strip()))
+    m = _JSON_BLOCK_RE.search(t)
+    return orjson.loads(m.group(0) if m else t)
 def _load_file(path: str) -> str:
     with open(path, "r", encoding="utf-8") as f:
         return f.read()
+@lru_cache(maxsize=None)
+def _template_env(prompts_dir: str) -> Environment:
+    return Environment(loader=FileSystemLoader(prompts_dir, encoding="utf-8"), auto_reload=False)
+def load_template(tmpl_path) -> Template:
+    # Compiled once per process; the environment keeps it in its template cache
+    p = Path(tmpl_path)
+    return _template_env(str(p.parent)).get_template(p.name)
 def render_user_prompt(tmpl_path: str, claim_text: str, review_context: str, source_author: str, source_year: str, source_pdf_path: str, evidence: List[Dict[str,str]]) -> str:
-    tmpl = Template(_load_file(tmpl_path))
+    tmpl = load_template(tmpl_path)
     return tmpl.render(
         claim_text=claim_text,
         review_context=review_context,
@@ -14,32 +36,185 @@ def render_user_prompt(tmpl_path: str, claim_text: str, review_context: str, sou
         source_pdf_path=source_pdf_path,
         evidence=evidence
     )
-def openai_call(model: str, system_prompt: str, user_prompt: str, json_schema: Dict[str,Any], temperature: float=0.0, max_tokens: int=800) -> Dict[str,Any]:
+class RateLimiter:
+    # Request + token buckets refilled continuously at the per-minute rates; shared by all worker threads
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, cooldown_seconds: float = 15.0):
+        self.rpm, self.tpm = float(requests_per_minute), float(tokens_per_minute)
+        self.cooldown = float(cooldown_seconds)
+        self._requests, self._tokens = self.rpm, self.tpm
+        self._last = time.monotonic()
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed, self._last = now - self._last, now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+    def acquire(self, tokens: int) -> None:
+        tokens = min(tokens, self.tpm)  # an oversized prompt waits for a full bucket, not forever
+        while True:
+            with self._lock:
+                self._refill()
+                pause = self._resume_at - self._last
+                if pause > 0:
+                    wait = pause
+                elif self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                else:
+                    wait = max((1 - self._requests) * 60 / self.rpm, (tokens - self._tokens) * 60 / self.tpm)
+            time.sleep(max(wait, 0.01))
+    def backoff(self) -> None:
+        # Hit a 429 anyway: hold every thread for a cooldown, as the OpenAI cookbook parallel
+        # processor does, then carry on at the configured rates
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + self.cooldown)
+def rate_limiter_from_config(cfg: Dict[str,Any]) -> Optional[RateLimiter]:
+    rate = (cfg.get("llm") or {}).get("rate") or {}
+    if not rate:
+        return None
+    return RateLimiter(rate["max_requests_per_minute"], rate["max_tokens_per_minute"], rate.get("cooldown_seconds", 15.0))
+def estimate_tokens(*texts: str) -> int:
+    # ~4 characters per token for English prose; close enough for admission control
+    return sum(len(t) for t in texts) // 4 + 1
+@lru_cache(maxsize=1)
+def _openai_client():
+    # One client per process: its httpx connection pool (and the TLS sessions in it)
+    # is reused by every call and shared across the worker threads. Transient failures
+    # (429, 5xx, timeouts, dropped connections) are retried by the SDK with exponential backoff.
+    from openai import OpenAI
+    return OpenAI(max_retries=5)
+# Which endpoint this SDK/account accepts is settled by the first call and reused for the run,
+# so a request the Responses path can't carry doesn't cost a failed attempt on every claim
+_api_mode: Dict[str,str] = {}
+def _call_responses(client, model: str, system_prompt: str, user_prompt: str, temperature: float, max_tokens: int, extra: Dict[str,Any]) -> str:
+    resp = client.responses.create(
+        model=model,
+        temperature=temperature,
+        input=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        text={"format": {"type": "json_object"}},
+        max_output_tokens=max_tokens,
+        **extra
+    )
+    return resp.output_text
+def _call_chat(client, model: str, system_prompt: str, user_prompt: str, temperature: float, max_tokens: int, extra: Dict[str,Any]) -> str:
+    resp = client.chat.completions.create(
+        model=model,
+        temperature=temperature,
+        messages=[
+            {"role":"system","content": system_prompt},
+            {"role":"user","content": user_prompt}
+        ],
+        response_format={"type":"json_object"},
+        max_tokens=max_tokens,
+        **extra
+    )
+    return resp.choices[0].message.content
+def _llm_error(e: Exception) -> Dict[str,Any]:
+    return {"verdict":"UNSUPPORTED_FAIL","rationale":f"LLM error: {e}","evidence_span":"","required_fix":None,"risk_flags":["llm_error"]}
+def openai_call(model: str, system_prompt: str, user_prompt: str, json_schema: Dict[str,Any], temperature: float=0.0, max_tokens: int=800, limiter: Optional[RateLimiter]=None, prompt_cache_key: Optional[str]=None) -> Dict[str,Any]:
+    est = estimate_tokens(system_prompt, user_prompt) + max_tokens
+    # The system prompt is the invariant prefix of every request; a shared cache key routes
+    # same-task requests together so the server-side prefix cache actually gets hit
+    extra = {"extra_body": {"prompt_cache_key": prompt_cache_key}} if prompt_cache_key else {}
+    args = (model, system_prompt, user_prompt, temperature, max_tokens, extra)
+    try:
+        from openai import NotFoundError, RateLimitError
+    except ImportError as e:
+        return _llm_error(e)
     try:
-        from openai import OpenAI
-        client = OpenAI()
+        client = _openai_client()
+        if limiter is not None:
+            limiter.acquire(est)
+        mode = _api_mode.get("mode")
+        if mode is None:
+            try:
+                text = _call_responses(client, *args)
+                _api_mode["mode"] = "responses"
+                return parse_json_response(text)
+            except (TypeError, AttributeError, NotFoundError):
+                # The SDK (or endpoint) has no Responses API; chat it is from now on.
+                # Anything else (a rejected prompt, a 429) is about this call, not the mode
+                _api_mode["mode"] = mode = "chat"
+        text = (_call_responses if mode == "responses" else _call_chat)(client, *args)
+        return parse_json_response(text)
+    except Exception as e:
+        if limiter is not None and isinstance(e, RateLimitError):
+            limiter.backoff()
+        return _llm_error(e)
+def _cache_path(cache_dir: Path, model: str, system_prompt: str, user_prompt: str, json_schema: Dict[str,Any], temperature: float, max_tokens: int) -> Path:
+    # Prompts are deterministic per claim, so reruns only pay for claims whose prompt changed;
+    # everything that shapes the response is part of the key
+    key_src = "\x1f".join((model, str(temperature), str(max_tokens), system_prompt, user_prompt, json.dumps(json_schema, sort_keys=True)))
+    key = hashlib.blake2b(key_src.encode("utf-8"), digest_size=16).hexdigest()
+    return Path(cache_dir) / f"{key}.json"
+def _cache_put(path: Path, res: Dict[str,Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(res, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+def cached_openai_call(cache_dir: Path, model: str, system_prompt: str, user_prompt: str, json_schema: Dict[str,Any], temperature: float=0.0, max_tokens: int=800, **kwargs) -> Dict[str,Any]:
+    path = _cache_path(cache_dir, model, system_prompt, user_prompt, json_schema, temperature, max_tokens)
+    try:
+        # One open() per lookup; a miss is the exception, not an extra stat()
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    except FileNotFoundError:
+        pass
+    res = openai_call(model, system_prompt, user_prompt, json_schema, temperature=temperature, max_tokens=max_tokens, **kwargs)
+    if "llm_error" not in (res.get("risk_flags") or []):
+        _cache_put(path, res)
+    return res
+def batch_fill_cache(cache_dir: Path, model: str, system_prompt: str, user_prompts: List[str], json_schema: Dict[str,Any], temperature: float=0.0, max_tokens: int=800, poll_seconds: float=60.0, prompt_cache_key: Optional[str]=None) -> int:
+    """
+    Answer every uncached prompt through the OpenAI Batch API (half price, no online RPM/TPM,
+    up to 24 h turnaround) and store the results where cached_openai_call looks for them.
+    Blocks until the batch finishes; returns how many prompts were cached. Prompts the batch
+    could not answer stay uncached, so a following cached_openai_call falls back to an online call.
+    """
+    todo: Dict[str,Path] = {}
+    seen = set()
+    lines = []
+    for i, up in enumerate(user_prompts):
+        path = _cache_path(cache_dir, model, system_prompt, up, json_schema, temperature, max_tokens)
+        if path in seen or path.exists():
+            continue
+        seen.add(path)
+        todo[str(i)] = path
+        lines.append(orjson.dumps({
+            "custom_id": str(i), "method": "POST", "url": "/v1/chat/completions",
+            "body": {"model": model, "temperature": temperature, "max_tokens": max_tokens,
+                     "response_format": {"type": "json_object"},
+                     "messages": [{"role": "system", "content": system_prompt}, {"role": "user", "content": up}],
+                     **({"prompt_cache_key": prompt_cache_key} if prompt_cache_key else {})},
+        }))
+    if not todo:
+        return 0
+    client = _openai_client()
+    upload = client.files.create(file=("batch_input.jsonl", b"\n".join(lines) + b"\n"), purpose="batch")
+    batch = client.batches.create(input_file_id=upload.id, endpoint="/v1/chat/completions", completion_window="24h")
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        time.sleep(poll_seconds)
+        batch = client.batches.retrieve(batch.id)
+    if not batch.output_file_id:
+        return 0
+    n = 0
+    for line in client.files.content(batch.output_file_id).read().splitlines():
+        if not line.strip():
+            continue
+        item = orjson.loads(line)
+        path = todo.get(item.get("custom_id"))
+        body = (item.get("response") or {}).get("body") or {}
+        if path is None or item.get("error") or not body.get("choices"):
+            continue
         try:
-            resp = client.responses.create(
-                model=model,
-                input=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type":"json_object"}
-            )
-            text = resp.output_text
+            res = parse_json_response(body["choices"][0]["message"]["content"])
         except Exception:
-            resp = client.chat.completions.create(
-                model=model,
-                temperature=temperature,
-                messages=[
-                    {"role":"system","content": system_prompt},
-                    {"role":"user","content": user_prompt}
-                ],
-                response_format={"type":"json_object"},
-                max_tokens=max_tokens
-            )
-            text = resp.choices[0].message.content
-        return json.loads(text)
-    except Exception as e:
-        return {"verdict":"UNSUPPORTED_FAIL","rationale":f"LLM error: {e}","evidence_span":"","required_fix":None,"risk_flags":["llm_error"]}
+            continue
+        _cache_put(path, res)
+        n += 1
+    return n
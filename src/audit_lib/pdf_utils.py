@@ -1,6 +1,11 @@
-from typing import Dict
-from pypdf import PdfReader
+from bisect import bisect_right
+from typing import Dict, List
+from audit_lib.text_utils import normalize_quotes
+
+_PAGE_SEP = "\x1f\x1f"  # never occurs in extracted text, so no match can straddle two pages
 def pdf_to_text_with_page_markers(pdf_path: str) -> str:
+    # pypdf is only needed here; keep it out of split_pages users' import time
+    from pypdf import PdfReader
     reader = PdfReader(pdf_path)
     out_lines = []
     for i, page in enumerate(reader.pages, start=1):
@@ -23,3 +28,24 @@ def split_pages(text_with_markers: str) -> Dict[int, str]:
     if current_page is not None:
         pages[current_page] = "\n".join(buf).strip()
     return pages
+def build_page_index(pages: Dict[int, str]):
+    """Quote-normalized text of every page joined into one buffer, with each page's start offset."""
+    pnos = list(pages)
+    norm = [normalize_quotes(pages[p]) for p in pnos]
+    starts, pos = [], 0
+    for t in norm:
+        starts.append(pos)
+        pos += len(t) + len(_PAGE_SEP)
+    return _PAGE_SEP.join(norm), starts, pnos
+def find_pages(page_index, needle: str) -> List[int]:
+    """Pages whose normalized text contains needle, in page order; one buffer scan, skipping to the next page per hit."""
+    buf, starts, pnos = page_index
+    hits = []
+    i = buf.find(needle)
+    while i != -1:
+        k = bisect_right(starts, i) - 1
+        hits.append(pnos[k])
+        if k + 1 == len(starts):
+            break
+        i = buf.find(needle, starts[k + 1])
+    return hits
@@ -15,8 +15,11 @@ def chunk_pages_to_windows(pages: Dict[int,str], chunk_words=180, stride=90) ->
                 "text": piece
             })
     return chunks
-def top_k_chunks_for_claim(claim: str, chunks: List[Dict[str,Any]], k=5) -> List[Dict[str,Any]]:
-    corpus = [c["text"] for c in chunks]
+def build_chunk_index(chunks: List[Dict[str,Any]]):
+    # The scoring corpus for one source; build once and query it for every claim on that source
+    return chunks, [c["text"] for c in chunks]
+def top_k_from_index(index, claim: str, k=5) -> List[Dict[str,Any]]:
+    chunks, corpus = index
     ranked = process.extract(claim, corpus, scorer=fuzz.token_set_ratio, limit=k)
     results = []
     for (_, score, idx) in ranked:
@@ -27,3 +30,5 @@ def top_k_chunks_for_claim(claim: str, chunks: List[Dict[str,Any]], k=5) -> List
             "score": int(score)
         })
     return results
+def top_k_chunks_for_claim(claim: str, chunks: List[Dict[str,Any]], k=5) -> List[Dict[str,Any]]:
+    return top_k_from_index(build_chunk_index(chunks), claim, k=k)